@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import tinyec.aio as aio
+import tinyec.ec as ec
+import tinyec.registry as reg
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super(CountingExecutor, self).__init__(max_workers=2)
+        self.batches = []
+
+    def submit(self, func, key, jobs, hardened):
+        self.batches.append(len(jobs))
+        return super(CountingExecutor, self).submit(func, key, jobs, hardened)
+
+
+class TestCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.curve = reg.get_curve("secp192r1")
+        self.executor = CountingExecutor()
+        self.coalescer = aio.Coalescer(self.executor, max_batch=4)
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+        self.executor.shutdown()
+
+    def run_all(self, awaitables):
+        async def gather():
+            return await asyncio.gather(*awaitables, return_exceptions=True)
+        return self.loop.run_until_complete(gather())
+
+    def test_when_secrets_are_awaited_together_then_they_are_batched(self):
+        ecdh = ec.ECDH(ec.make_keypair(self.curve))
+        peers = [ec.make_keypair(self.curve) for _ in range(6)]
+        secrets = self.run_all([ecdh.aget_secret(peer, self.coalescer) for peer in peers])
+        self.assertEqual([ecdh.get_secret(peer) for peer in peers], secrets)
+        self.assertEqual([4, 2], self.executor.batches)
+
+    def test_when_secrets_use_different_keys_then_results_match_ecdh(self):
+        pairs = [(ec.ECDH(ec.make_keypair(self.curve)), ec.make_keypair(self.curve)) for _ in range(3)]
+        pairs.append((pairs[0][0], pairs[1][1]))
+        pairs.append((ec.ECDH(ec.Keypair(self.curve, pub=pairs[2][1].pub)), pairs[0][0].keypair))
+        secrets = self.run_all([ecdh.aget_secret(peer, self.coalescer) for ecdh, peer in pairs])
+        self.assertEqual([ecdh.get_secret(peer) for ecdh, peer in pairs], secrets)
+
+    def test_when_keypairs_are_made_then_they_are_valid(self):
+        keypairs = self.run_all([ec.amake_keypair(self.curve, coalescer=self.coalescer) for _ in range(5)] +
+                                [ec.amake_keypair(self.curve, True, self.coalescer)])
+        self.assertEqual([4, 1, 1], sorted(self.executor.batches, reverse=True))
+        for keypair in keypairs:
+            self.assertEqual(keypair.priv * self.curve.g, keypair.pub)
+        self.assertEqual(6, len(set(keypair.priv for keypair in keypairs)))
+
+    def test_when_a_hardened_batch_fails_then_only_the_invalid_request_fails(self):
+        curve = reg.make_curve("secp192r1")
+        curve.mul_method = "ladder"
+        ecdh = ec.ECDH(ec.make_keypair(curve))
+        peers = [ec.make_keypair(curve).pub for _ in range(3)]
+        peers.insert(1, ec.Point(curve, peers[0].x, peers[0].y + 1, check=False))
+        results = self.run_all([ecdh.aget_secret(peer, self.coalescer) for peer in peers])
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual([ecdh.get_secret(peer) for peer in peers[:1] + peers[2:]], results[:1] + results[2:])
+
+    def test_when_executor_is_shut_down_then_all_requests_fail(self):
+        ecdh = ec.ECDH(ec.make_keypair(self.curve))
+        peers = [ec.make_keypair(self.curve) for _ in range(6)]
+        self.executor.shutdown()
+
+        async def gather():
+            return await asyncio.wait_for(asyncio.gather(*[ecdh.aget_secret(peer, self.coalescer) for peer in peers],
+                                                         return_exceptions=True), 5)
+        results = self.loop.run_until_complete(gather())
+        self.assertEqual(6, len(results))
+        for result in results:
+            self.assertIsInstance(result, RuntimeError)
+
+    def test_when_process_pool_is_used_then_results_match_ecdh(self):
+        ecdh = ec.ECDH(ec.make_keypair(self.curve))
+        peers = [ec.make_keypair(self.curve) for _ in range(5)]
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            aio.set_executor(executor)
+            try:
+                secrets = self.run_all([ecdh.aget_secret(peer) for peer in peers])
+            finally:
+                aio.set_executor(None)
+        self.assertEqual([ecdh.get_secret(peer) for peer in peers], secrets)
+
+    def test_when_batch_size_is_not_positive_then_error_is_raised(self):
+        with self.assertRaises(ValueError):
+            aio.Coalescer(max_batch=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
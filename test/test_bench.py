@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import tinyec.bench as bench
+
+
+class TestBench(unittest.TestCase):
+    def test_when_percentiles_are_computed_then_nearest_rank_is_returned(self):
+        values = list(range(100, 0, -1))
+        self.assertEqual(50, bench.percentile(values, 50))
+        self.assertEqual(99, bench.percentile(values, 99))
+        self.assertEqual(100, bench.percentile(values, 100))
+        self.assertEqual(1, bench.percentile(values, 0))
+        self.assertEqual(7, bench.percentile([7], 90))
+
+    def test_when_results_are_slower_than_baseline_then_regressions_are_reported(self):
+        baseline = {"secp256r1": {"add": {"ops_per_sec": 100.0}, "double": {"ops_per_sec": 100.0}}}
+        results = {"secp256r1": {"add": {"ops_per_sec": 85.0}, "double": {"ops_per_sec": 95.0},
+                                 "mod_inv": {"ops_per_sec": 1.0}},
+                   "secp521r1": {"add": {"ops_per_sec": 1.0}}}
+        self.assertEqual([("secp256r1", "add", 100.0, 85.0)], bench.compare_ops(results, baseline, 0.1))
+        self.assertEqual([], bench.compare_ops(results, baseline, 0.2))
+
+    def test_when_ops_are_benchmarked_then_json_results_can_be_compared(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "results.json")
+            self.assertEqual(0, bench.main(["ops", "--curves", "P-192", "--samples", "2", "--json", path]))
+            with open(path) as f:
+                results = json.load(f)["benchmarks"]["ops"]["secp192r1"]
+            self.assertEqual(set(bench.OPS), set(results))
+            for op in bench.OPS:
+                self.assertTrue(results[op]["ops_per_sec"] > 0)
+                self.assertTrue(results[op]["p50"] <= results[op]["p99"])
+            for op in bench.OPS:
+                results[op]["ops_per_sec"] *= 1000
+            with open(path, "w") as f:
+                json.dump({"benchmarks": {"ops": {"secp192r1": results}}}, f)
+            self.assertEqual(1, bench.main(["ops", "--curves", "secp192r1", "--samples", "2", "--json", "-",
+                                            "--baseline", path]))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_when_curve_is_unknown_then_error_is_reported(self):
+        with self.assertRaises(SystemExit):
+            bench.main(["ops", "--curves", "P-999"])
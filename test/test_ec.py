@@ -1,11 +1,64 @@
 # -*- coding: utf-8 -*-
 
+import binascii
+import os
+import pickle
+import shutil
+import tempfile
 import unittest
+import warnings
 
 import tinyec.ec as ec
 import tinyec.registry as reg
 
 
+class TestModInv(unittest.TestCase):
+    def test_when_egcd_is_computed_then_bezout_identity_holds(self):
+        for a, b in ((0, 5), (3, 7), (240, 46), (0x123456789abcdef, 0xfedcba987654321)):
+            g, x, y = ec.egcd(a, b)
+            self.assertEqual(g, a * x + b * y)
+
+    def test_when_backends_are_used_then_results_match(self):
+        p = 0xfffffffffffffffffffffffffffffffffffffffffffffffffffffffefffffc2f
+        for a in (1, 2, p - 1, -7, 0x79be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798):
+            for name, inverse in ec.MOD_INV_BACKENDS.items():
+                self.assertEqual(1, inverse(a, p) * a % p, name)
+        self.assertEqual(ec.mod_inv(1234, p), ec.mod_inv_egcd(1234, p))
+
+    def test_when_value_has_no_inverse_then_error_is_raised(self):
+        for name, inverse in ec.MOD_INV_BACKENDS.items():
+            with self.assertRaises(ArithmeticError):
+                inverse(0, 97)
+        with self.assertRaises(ArithmeticError):
+            ec.mod_inv(6, 15)
+        with self.assertRaises(ArithmeticError):
+            ec.mod_inv_binary(6, 15)
+
+    def test_when_values_are_inverted_in_batch_then_results_match_single_inversions(self):
+        p = 0xfffffffffffffffffffffffffffffffeffffffffffffffff
+        values = [1, 2, 3, p - 1, -5, 0x123456789abcdef, p + 7]
+        self.assertEqual([ec.mod_inv(v % p, p) for v in values], ec.batch_mod_inv(values, p))
+        self.assertEqual([], ec.batch_mod_inv([], p))
+
+    def test_when_a_value_is_not_invertible_then_error_is_raised(self):
+        with self.assertRaises(ArithmeticError):
+            ec.batch_mod_inv([3, 0, 5], 97)
+
+
+class TestModSqrt(unittest.TestCase):
+    def test_when_square_roots_are_computed_then_they_square_back(self):
+        for p in (13, 97, reg.EC_CURVE_REGISTRY["secp224r1"]["p"], reg.EC_CURVE_REGISTRY["secp256r1"]["p"]):
+            for x in (0, 1, 2, 0x123456789, p - 1):
+                r = ec.mod_sqrt(x * x, p)
+                self.assertEqual(x * x % p, r * r % p)
+
+    def test_when_value_is_not_a_square_then_error_is_raised(self):
+        for p in (13, 97, reg.EC_CURVE_REGISTRY["secp224r1"]["p"], reg.EC_CURVE_REGISTRY["secp256r1"]["p"]):
+            non_residue = next(x for x in range(2, p) if pow(x, (p - 1) // 2, p) == p - 1)
+            with self.assertRaises(ArithmeticError):
+                ec.mod_sqrt(non_residue, p)
+
+
 class TestCurve(unittest.TestCase):
 
     def setUp(self):
@@ -49,6 +102,42 @@ class TestPoint(unittest.TestCase):
             with self.assertRaises(UserWarning):
                 p1 + p2
 
+    def test_when_check_is_deferred_then_point_is_validated_on_demand(self):
+        import warnings
+        with warnings.catch_warnings():
+            warnings.filterwarnings("error")
+            p1 = ec.Point(self.curve, 94, 31, check=False)
+            with self.assertRaises(UserWarning):
+                p1.on_curve
+        self.assertTrue(ec.Point(self.curve, 22, 5, check=False).on_curve)
+        self.assertTrue(ec.Point(self.curve, 22, 5, check=False).validate())
+
+    def test_when_points_are_created_then_they_have_no_dict(self):
+        p1 = ec.Point(self.curve, 22, 5)
+        for obj in (p1, ec.Inf(self.curve), self.curve, self.field):
+            self.assertFalse(hasattr(obj, "__dict__"))
+        self.assertEqual(97, p1.p)
+
+    def test_when_points_are_derived_from_valid_points_then_they_are_not_checked_again(self):
+        p1 = ec.Point(self.curve, 22, 5)
+        p2 = ec.Point(self.curve, 95, 31)
+        calls = []
+        on_curve = self.curve.on_curve
+        curve = self.curve
+
+        class CountingCurve(object):
+            def __getattr__(self, name):
+                return getattr(curve, name)
+
+            def on_curve(self, x, y):
+                calls.append((x, y))
+                return on_curve(x, y)
+
+        p1.curve = p2.curve = CountingCurve()
+        p1 + p2
+        p1 * 3
+        self.assertEqual([], calls)
+
     def test_when_point_is_added_to_infinity_then_point_is_returned(self):
         p1 = ec.Point(self.curve, 22, 5)
         p2 = ec.Inf(self.curve)
@@ -85,6 +174,25 @@ class TestPoint(unittest.TestCase):
         self.assertEqual(ec.Point(self.curve, 80, 10), p1 * -3)
         self.assertEqual(ec.Inf(self.curve), p1 * 10)
 
+    def test_when_point_is_scalar_multiplied_then_result_matches_repeated_additions(self):
+        p1 = ec.Point(self.curve, 3, 6)
+        result = ec.Inf(self.curve)
+        for k in range(1, 12):
+            result = result + p1
+            self.assertEqual(result, p1 * k)
+
+    def test_when_point_with_null_ordinate_is_doubled_then_result_is_infinite(self):
+        p1 = ec.Point(self.curve, 96, 0)
+        self.assertEqual(ec.Inf(self.curve), p1 + p1)
+        self.assertEqual(ec.Inf(self.curve), p1 * 2)
+
+    def test_when_jacobian_point_is_converted_then_affine_point_is_returned(self):
+        p = self.field.p
+        z = 5
+        jacobian = (22 * z**2 % p, 5 * z**3 % p, z)
+        self.assertEqual((22, 5), ec.jacobian_to_affine(jacobian, p))
+        self.assertIsNone(ec.jacobian_to_affine(ec.JACOBIAN_INF, p))
+
     def test_when_point_is_not_multiplied_by_an_int_then_error_is_raised(self):
         p1 = ec.Point(self.curve, 3, 6)
         with self.assertRaises(TypeError) as contextMgr:
@@ -100,6 +208,433 @@ class TestPoint(unittest.TestCase):
         tErr = contextMgr.exception
         self.assertRegexpMatches(str(tErr), "Unsupported operand type\\(s\\) for \\*\\: \'float\' and \'Point\'", "Unexpected TypeError message - did the message change or this being thrown from a different location?")
 
+
+class TestScalarMultiplicationMethods(unittest.TestCase):
+    def setUp(self):
+        self.curve = reg.get_curve("secp256r1")
+        self.point = 0x1234567890abcdef * self.curve.g
+        super(TestScalarMultiplicationMethods, self).setUp()
+
+    def test_when_wnaf_is_computed_then_digits_recompose_scalar(self):
+        k = 0xa78a236d60baec0c5dd41b33a542463a8255391af64c74ee
+        for window in range(2, 7):
+            digits = ec.wnaf(k, window)
+            self.assertEqual(k, sum(d << i for i, d in enumerate(digits)))
+            for i, d in enumerate(digits):
+                if d:
+                    self.assertEqual(1, d % 2)
+                    self.assertTrue(abs(d) < 2 ** (window - 1))
+                    self.assertFalse(any(digits[i + 1:i + window]))
+
+    def test_when_methods_are_selected_then_results_match(self):
+        k = self.curve.field.n // 3
+        expected = self.point.mul(k, method="binary")
+        for window in range(2, 7):
+            self.assertEqual(expected, self.point.mul(k, method="wnaf", window=window))
+        self.assertEqual(-expected.y % self.curve.field.p, self.point.mul(-k, method="wnaf").y)
+        self.assertEqual(expected, self.curve.g.mul(k * 0x1234567890abcdef, method="binary"))
+
+    def test_when_method_is_selected_on_curve_then_it_is_used(self):
+        curve = reg.make_curve("secp256r1")
+        curve.mul_method = "unknown"
+        with self.assertRaises(ValueError):
+            ec.Point(curve, self.point.x, self.point.y) * 3
+        curve.mul_method = "binary"
+        self.assertEqual(self.point * 3, ec.Point(curve, self.point.x, self.point.y) * 3)
+
+    def test_when_window_is_too_small_then_error_is_raised(self):
+        with self.assertRaises(ValueError):
+            self.point.mul(12345, method="wnaf", window=1)
+        curve = reg.make_curve("secp256k1")
+        curve.wnaf_window = 1
+        for method in ("wnaf", "glv"):
+            with self.assertRaises(ValueError):
+                ec.Point(curve, curve.g.x, curve.g.y).mul(12345, method)
+        self.assertEqual(12345 * curve.g, ec.Point(curve, curve.g.x, curve.g.y).mul(12345, "binary"))
+
+
+class TestCurveShapes(unittest.TestCase):
+    def test_when_curve_is_built_then_shape_is_detected(self):
+        self.assertEqual("a=0", reg.get_curve("secp256k1").shape)
+        self.assertEqual("a=-3", reg.get_curve("secp256r1").shape)
+        self.assertEqual("generic", reg.get_curve("brainpoolP256r1").shape)
+        self.assertEqual(ec.jacobian_double_a3, reg.get_curve("secp384r1").group_law[0])
+
+    def test_when_specialized_doublings_are_used_then_results_match_generic_doubling(self):
+        for name, double in (("secp256k1", ec.jacobian_double_a0), ("secp256r1", ec.jacobian_double_a3),
+                             ("secp521r1", reg.get_curve("secp521r1").group_law[0])):
+            curve = reg.get_curve(name)
+            p = curve.field.p
+            P = (curve.g.x * 9 % p, curve.g.y * 27 % p, 3)
+            for _ in range(10):
+                expected = ec.jacobian_to_affine(ec.jacobian_double(P, curve.a, p), p)
+                P = double(P, curve.a, p)
+                self.assertEqual(expected, ec.jacobian_to_affine(P, p))
+            self.assertEqual(ec.JACOBIAN_INF, double(ec.JACOBIAN_INF, curve.a, p))
+
+    def test_when_shape_is_specialized_then_scalar_multiplication_matches_generic_curve(self):
+        for name in ("secp256k1", "secp256r1"):
+            curve = reg.make_curve(name)
+            generic = reg.make_curve(name)
+            generic.group_law = (ec.jacobian_double, ec.jacobian_add, ec.jacobian_add_affine)
+            k = curve.field.n // 5
+            for method in ec.MUL_METHODS:
+                self.assertEqual(ec.Point(generic, curve.g.x, curve.g.y).mul(k, method), curve.g.mul(k, method))
+
+
+class TestEndomorphism(unittest.TestCase):
+    def setUp(self):
+        self.curve = reg.get_curve("secp256k1")
+        self.point = 0x1234567890abcdef * self.curve.g
+        super(TestEndomorphism, self).setUp()
+
+    def test_when_registry_has_endomorphism_then_curve_uses_glv(self):
+        endomorphism = self.curve.endomorphism
+        self.assertEqual("glv", self.curve.mul_method)
+        image = endomorphism.lam * self.point
+        self.assertEqual((endomorphism.beta * self.point.x % self.curve.field.p, self.point.y), (image.x, image.y))
+        self.assertIsNone(reg.get_curve("secp256r1").endomorphism)
+        self.assertEqual("wnaf", reg.get_curve("secp256r1").mul_method)
+        with self.assertRaises(ValueError):
+            reg.get_curve("secp256r1").g.mul(3, method="glv")
+
+    def test_when_scalar_is_split_then_halves_recompose_scalar(self):
+        n = self.curve.field.n
+        for k in (1, n - 1, n // 3, 0xa78a236d60baec0c5dd41b33a542463a8255391af64c74ee, n + 5):
+            k1, k2 = self.curve.endomorphism.split(k, n)
+            self.assertEqual(k % n, (k1 + k2 * self.curve.endomorphism.lam) % n)
+            self.assertTrue(abs(k1).bit_length() <= 129 and abs(k2).bit_length() <= 129)
+
+    def test_when_glv_is_used_then_results_match_wnaf(self):
+        n = self.curve.field.n
+        for k in (1, 2, n - 1, n // 3, -n // 7, n + 5):
+            self.assertEqual(self.point.mul(k, method="wnaf"), self.point.mul(k, method="glv"))
+        unchecked = ec.Point(self.curve, self.point.x, self.point.y + 1, check=False)
+        self.assertEqual(unchecked.mul(n // 3, method="wnaf"), unchecked.mul(n // 3))
+
+    def test_when_terms_are_multiplied_then_glv_matches_generic_path(self):
+        n = self.curve.field.n
+        terms = [(n // (i + 2), (i + 1) * self.point) for i in range(6)]
+        expected = terms[0][0] * terms[0][1]
+        for k, point in terms[1:]:
+            expected += k * point
+        for method in ("straus", "pippenger"):
+            self.assertEqual(expected, ec.multi_mul(terms, method))
+
+
+class TestEncoding(unittest.TestCase):
+    def setUp(self):
+        self.curve = reg.get_curve("secp256r1")
+        super(TestEncoding, self).setUp()
+
+    def test_when_generator_is_encoded_then_sec1_encoding_is_returned(self):
+        x = "6b17d1f2e12c4247f8bce6e563a440f277037d812deb33a0f4a13945d898c296"
+        y = "4fe342e2fe1a7f9b8ee7eb4a7c0f9e162bce33576b315ececbb6406837bf51f5"
+        self.assertEqual("03" + x, binascii.hexlify(self.curve.g.encode()).decode())
+        self.assertEqual("04" + x + y, binascii.hexlify(self.curve.g.encode(compressed=False)).decode())
+        self.assertEqual(b"\x00", ec.Inf(self.curve).encode())
+
+    def test_when_points_are_encoded_then_they_are_decoded_back(self):
+        for name in reg.EC_CURVE_REGISTRY:
+            curve = reg.get_curve(name)
+            for point in (curve.g, 0x1234567890abcdef * curve.g, -1 * curve.g):
+                for compressed in (True, False):
+                    self.assertEqual(point, ec.Point.decode(curve, point.encode(compressed)))
+            self.assertEqual(ec.Inf(curve), ec.Point.decode(curve, b"\x00"))
+
+    def test_when_encoding_is_invalid_then_error_is_raised(self):
+        encoded = self.curve.g.encode(compressed=False)
+        p = self.curve.field.p
+        x = next(x for x in range(p) if pow(x ** 3 + self.curve.a * x + self.curve.b, (p - 1) // 2, p) == p - 1)
+        for data in (b"", encoded[:-1], b"\x05" + encoded[1:], b"\x02" + encoded[1:], b"\x02" + b"\xff" * 32,
+                     b"\x03" + ec.int_to_bytes(x, 32)):
+            with self.assertRaises(ValueError):
+                ec.Point.decode(self.curve, data)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.assertFalse(ec.Point.decode(self.curve, encoded[:-1] + b"\x00").on_curve)
+
+    def test_when_y_is_zero_then_only_even_compressed_encoding_is_accepted(self):
+        # y^2 = x^3 + 2x - 3 (mod 97) holds (1, 0)
+        curve = ec.Curve(2, -3 % 97, ec.SubGroup(97, (1, 0), 2, 1))
+        self.assertEqual(b"\x02\x01", curve.g.encode())
+        self.assertEqual(curve.g, ec.Point.decode(curve, b"\x02\x01"))
+        with self.assertRaises(ValueError):
+            ec.Point.decode(curve, b"\x03\x01")
+
+    def test_when_keypair_is_encoded_then_it_is_decoded_back(self):
+        keypair = ec.make_keypair(self.curve)
+        decoded = ec.Keypair.decode(self.curve, keypair.encode_priv(), keypair.encode())
+        self.assertEqual((keypair.priv, keypair.pub), (decoded.priv, decoded.pub))
+        self.assertEqual(32, len(keypair.encode_priv()))
+        public = ec.Keypair.decode(self.curve, pub=keypair.encode(compressed=False))
+        self.assertFalse(public.can_sign)
+        with self.assertRaises(ValueError):
+            public.encode_priv()
+        with self.assertRaises(ValueError):
+            ec.Keypair.decode(self.curve, priv=ec.int_to_bytes(self.curve.field.n, 32))
+
+    def test_when_points_are_encoded_in_bulk_then_they_are_decoded_back(self):
+        points = [(k * 0x9e3779b97f4a7c15) * self.curve.g for k in range(1, 20)]
+        for compressed in (True, False):
+            data = ec.encode_points(points, compressed)
+            for buffer in (data, bytearray(data), memoryview(data)):
+                self.assertEqual(points, list(ec.decode_points(self.curve, buffer, compressed)))
+            with self.assertRaises(ValueError):
+                list(ec.decode_points(self.curve, data[:-1], compressed))
+
+
+class TestPointArray(unittest.TestCase):
+    def setUp(self):
+        self.curve = reg.get_curve("secp256r1")
+        self.points = [(k * 0x9e3779b97f4a7c15) * self.curve.g for k in range(1, 11)]
+        self.array = ec.PointArray.from_points(self.curve, self.points)
+        super(TestPointArray, self).setUp()
+
+    def test_when_points_are_stored_then_they_are_packed_in_a_single_buffer(self):
+        self.assertEqual(10, len(self.array))
+        self.assertEqual(10 * 64, len(self.array.data))
+        self.assertEqual(self.points, list(self.array))
+        self.assertEqual([(point.x, point.y) for point in self.points], list(self.array.coordinates()))
+        self.assertEqual(self.points[3], self.array[3])
+        self.assertEqual(self.points[-1], self.array[-1])
+        with self.assertRaises(IndexError):
+            self.array[10]
+
+    def test_when_array_is_sliced_then_points_are_copied(self):
+        self.assertEqual(self.points[2:7], list(self.array[2:7]))
+        self.assertEqual(self.points[1::3], list(self.array[1::3]))
+        self.assertEqual(self.points[::-1], list(self.array[::-1]))
+        self.assertEqual([], list(self.array[7:2]))
+        head = self.array[:3]
+        # Live slices neither prevent the array from growing, nor are affected by it
+        self.array.append(self.points[0])
+        head.append(self.points[5])
+        self.assertEqual(self.points + self.points[:1], list(self.array))
+        self.assertEqual(self.points[:3] + self.points[5:6], list(head))
+
+    def test_when_points_are_appended_then_they_are_stored(self):
+        array = ec.PointArray(self.curve)
+        array.append(self.points[0])
+        array.extend(self.points[1:])
+        self.assertEqual(self.points, list(array))
+        with self.assertRaises(ValueError):
+            array.append(ec.Inf(self.curve))
+        with self.assertRaises(ValueError):
+            array.append(reg.get_curve("secp256k1").g)
+        with self.assertRaises(ValueError):
+            ec.PointArray(self.curve, b"\x00" * 65)
+
+    def test_when_array_is_dumped_then_it_is_loaded_back_through_a_memory_map(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "keys")
+            self.array.dump(path)
+            with ec.PointArray.load(self.curve, path) as array:
+                self.assertEqual(self.points, list(array))
+                head = array[:3]
+                with self.assertRaises(TypeError):
+                    array.append(self.points[0])
+            # The slice outlives the memory map
+            self.assertEqual(self.points[:3], list(head))
+            ec.PointArray(self.curve).dump(path)
+            self.assertEqual(0, len(ec.PointArray.load(self.curve, path)))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_when_array_is_used_by_batch_apis_then_results_match(self):
+        ecdh = ec.ECDH(ec.make_keypair(self.curve))
+        expected = [ecdh.get_secret(ec.Keypair(self.curve, pub=point)) for point in self.points]
+        self.assertEqual(expected, ecdh.get_secrets(self.array))
+        self.assertEqual(expected, ecdh.get_secrets(list(self.array)))
+        scalars = list(range(3, 13))
+        self.assertEqual(ec.multi_mul(zip(scalars, self.points)), ec.multi_mul(zip(scalars, self.array)))
+
+
+def wei25519():
+    # Curve25519 in short Weierstrass form, of cofactor 8, along with a point on the curve but not in
+    # the subgroup
+    p = 2 ** 255 - 19
+    a = 0x2aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa984914a144
+    b = 0x7b425ed097b425ed097b425ed097b425ed097b425ed097b4260b5e9c7710c864
+    g = (0x2aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaad245a,
+         0x5f51e65e475f794b1fe122d388b72eb36dc2b28192839e4dd6163a5d81312c14)
+    n = 2 ** 252 + 0x14def9dea2f79cd65812631a5cf5d3ed
+    curve = ec.Curve(a, b, ec.SubGroup(p, g, n, 8), "wei25519")
+    return curve, ec.Point(curve, 1, ec.mod_sqrt(1 + a + b, p))
+
+
+class TestHardenedMode(unittest.TestCase):
+    def test_when_points_are_added_with_complete_formulas_then_results_match_jacobian_addition(self):
+        for name in ("secp256r1", "secp256k1", "brainpoolP256r1"):
+            curve = reg.get_curve(name)
+            a, b3, p = curve.a, 3 * curve.b % curve.field.p, curve.field.p
+            P, Q = 3 * curve.g, 5 * curve.g
+            for R, S in ((P, Q), (P, P), (P, -1 * P), (Q, P)):
+                expected = ec.jacobian_to_affine(ec.jacobian_add((R.x, R.y, 1), (S.x, S.y, 1), a, p), p)
+                X, Y, Z = ec.complete_add((R.x * 7 % p, R.y * 7 % p, 7), (S.x, S.y, 1), a, b3, p)
+                self.assertEqual(expected, (X * ec.mod_inv(Z, p) % p, Y * ec.mod_inv(Z, p) % p) if Z else None)
+            self.assertEqual(0, ec.complete_add(ec.PROJECTIVE_INF, ec.PROJECTIVE_INF, a, b3, p)[2])
+            X, Y, Z = ec.complete_add(ec.PROJECTIVE_INF, (P.x, P.y, 1), a, b3, p)
+            self.assertEqual((P.x, P.y), (X * ec.mod_inv(Z, p) % p, Y * ec.mod_inv(Z, p) % p))
+
+    def test_when_ladder_is_used_then_results_match_wnaf(self):
+        for name in ("secp256r1", "secp256k1", "brainpoolP256r1", "secp521r1"):
+            curve = reg.get_curve(name)
+            point = 0x1234567890abcdef * curve.g
+            n = curve.field.n
+            for k in (1, 2, n - 1, n // 3, -n // 7, n + 5):
+                self.assertEqual(point.mul(k, method="wnaf"), point.mul(k, method="ladder"))
+            self.assertEqual(ec.Inf(curve), point.mul(n, method="ladder"))
+            self.assertEqual(ec.Inf(curve), point.mul(0, method="ladder"))
+
+    def test_when_curve_uses_ladder_then_keys_and_secrets_match_fast_mode(self):
+        curve = reg.make_curve("secp256k1")
+        curve.mul_method = "ladder"
+        fast = reg.get_curve("secp256k1")
+        keypair = ec.make_keypair(curve)
+        self.assertEqual(keypair.priv * fast.g, ec.Point(fast, keypair.pub.x, keypair.pub.y))
+        peers = [ec.make_keypair(curve) for _ in range(3)]
+        secrets = ec.ECDH(keypair).get_secrets(peers)
+        for peer, secret in zip(peers, secrets):
+            self.assertEqual(keypair.priv * ec.Point(fast, peer.pub.x, peer.pub.y), ec.Point(fast, secret.x, secret.y))
+        batch = ec.make_keypairs(curve, 3)
+        for i in range(3):
+            self.assertEqual(batch.priv[i] * fast.g, ec.Point(fast, batch.x[i], batch.y[i]))
+
+    def test_when_point_is_not_on_curve_then_ladder_rejects_it(self):
+        curve = reg.get_curve("secp256r1")
+        point = ec.Point(curve, curve.g.x, curve.g.y + 1, check=False)
+        with self.assertRaises(ValueError):
+            point.mul(3, method="ladder")
+
+    def test_when_curve_has_a_cofactor_then_ladder_is_rejected(self):
+        curve, torsion = wei25519()
+        for point in (curve.g, torsion):
+            with self.assertRaises(ValueError):
+                point.mul(5, method="ladder")
+        with self.assertRaises(ValueError):
+            curve.mul_method = "ladder"
+        self.assertEqual("wnaf", curve.mul_method)
+        with self.assertRaises(ValueError):
+            ec.make_keypair(curve, hardened=True)
+
+    def test_when_hardened_keypair_is_generated_then_public_key_matches_private_key(self):
+        curve = reg.get_curve("secp256r1")
+        keypair = ec.make_keypair(curve, hardened=True)
+        self.assertTrue(0 < keypair.priv < curve.field.n)
+        self.assertEqual(keypair.priv * curve.g, keypair.pub)
+
+
+class TestPointValidation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cofactor_curve, cls.torsion = wei25519()
+
+    def setUp(self):
+        self.curve = reg.get_curve("secp256r1")
+        self.points = [ec.make_keypair(self.curve).pub for _ in range(5)]
+
+    def test_when_point_is_valid_then_it_is_marked_as_on_curve(self):
+        point = ec.Point(self.curve, self.points[0].x, self.points[0].y, check=False)
+        ec.check_point(self.curve, point)
+        self.assertTrue(point._on_curve)
+        ec.check_points(self.curve, self.points)
+        ec.check_point(self.cofactor_curve, self.cofactor_curve.g)
+
+    def test_when_point_is_invalid_then_error_is_raised(self):
+        p = self.curve.field.p
+        point = self.points[0]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            invalid = [ec.Inf(self.curve), ec.Point(self.curve, point.x + p, point.y),
+                       ec.Point(self.curve, point.x, -point.y), ec.Point(self.curve, point.x, point.y + 1),
+                       reg.get_curve("secp256k1").g, self.torsion]
+        for point in invalid:
+            with self.assertRaises(ValueError):
+                ec.check_point(self.curve if point is not self.torsion else self.cofactor_curve, point)
+        with self.assertRaises(TypeError):
+            ec.check_point(self.curve, (point.x, point.y))
+
+    def test_when_batch_holds_an_invalid_point_then_its_index_is_reported(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            points = self.points[:3] + [ec.Point(self.curve, 1, 1)] + self.points[3:]
+        with self.assertRaises(ValueError) as context:
+            ec.check_points(self.curve, points)
+        self.assertIn("index 3", str(context.exception))
+        array = ec.PointArray.from_points(self.curve, points)
+        with self.assertRaises(ValueError) as context:
+            ec.check_points(self.curve, array)
+        self.assertIn("index 3", str(context.exception))
+        ec.check_points(self.curve, array[:3])
+
+    def test_when_batch_holds_a_point_out_of_the_subgroup_then_it_is_detected(self):
+        curve = self.cofactor_curve
+        points = [ec.make_keypair(curve).pub for _ in range(40)]
+        # Few enough rounds for 40 points to be checked with linear combinations
+        ec.check_points(curve, points, security=32)
+        with self.assertRaises(ValueError) as context:
+            ec.check_points(curve, points[:25] + [self.torsion] + points[25:], security=32)
+        self.assertIn("index 25", str(context.exception))
+
+
+class TestNormalizeBatch(unittest.TestCase):
+    def test_when_jacobian_points_are_normalized_then_affine_points_are_returned(self):
+        curve = reg.get_curve("secp224r1")
+        p = curve.field.p
+        expected = [k * curve.g for k in range(1, 6)]
+        jacobian = [(P.x * z**2 % p, P.y * z**3 % p, z) for z, P in enumerate(expected, 7)]
+        jacobian.insert(2, ec.JACOBIAN_INF)
+        expected.insert(2, ec.Inf(curve))
+        self.assertEqual(expected, ec.normalize_batch(curve, jacobian))
+        self.assertEqual([], ec.normalize_batch(curve, []))
+
+
+class TestMultiMul(unittest.TestCase):
+    def setUp(self):
+        self.curve = reg.get_curve("secp192r1")
+        self.terms = [(k * 0x9e3779b97f4a7c15 % self.curve.field.n, (k + 1) * self.curve.g) for k in range(1, 12)]
+        self.terms.append((-5, self.terms[0][1]))
+        super(TestMultiMul, self).setUp()
+
+    def _sum_of_products(self, terms):
+        result = ec.Inf(self.curve)
+        for k, point in terms:
+            result = k * point + result
+        return result
+
+    def test_when_terms_are_multiplied_then_result_matches_sum_of_products(self):
+        expected = self._sum_of_products(self.terms)
+        self.assertEqual(expected, ec.multi_mul(self.terms))
+        self.assertEqual(expected, ec.multi_mul(self.terms, method="straus"))
+        self.assertEqual(expected, ec.multi_mul(self.terms, method="pippenger"))
+
+    def test_when_nist_routine_samples_are_used_then_joint_multiplication_matches(self):
+        s = ec.Point(self.curve, 0xd458e7d127ae671b0c330266d246769353a012073e97acf8,
+                     0x325930500d851f336bddc050cf7fb11b5673a1645086df3b)
+        t = ec.Point(self.curve, 0xf22c4395213e9ebe67ddecdd87fdbd01be16fb059b9753a4,
+                     0x264424096af2b3597796db48f8dfb41fa9cecc97691a9c79)
+        d = 0xa78a236d60baec0c5dd41b33a542463a8255391af64c74ee
+        e = 0xc4be3d53ec3089e71e4de8ceab7cce889bc393cd85b972bc
+        r = ec.multi_mul([(d, s), (e, t)])
+        self.assertEqual(0x19f64eed8fa9b72b7dfea82c17c9bfa60ecb9e1778b5bde, r.x)
+        self.assertEqual(0x16590c5fcd8655fa4ced33fb800e2a7e3c61f35d83503644, r.y)
+
+    def test_when_terms_cancel_out_then_result_is_infinite(self):
+        g = self.curve.g
+        self.assertEqual(ec.Inf(self.curve), ec.multi_mul([(3, g), (-3, g), (2, ec.Inf(self.curve))]))
+        self.assertEqual(ec.Inf(self.curve), ec.multi_mul([(3, g), (-3, g)], method="pippenger"))
+
+    def test_when_terms_are_invalid_then_error_is_raised(self):
+        with self.assertRaises(ValueError):
+            ec.multi_mul([])
+        with self.assertRaises(ValueError):
+            ec.multi_mul([(1, self.curve.g), (1, reg.get_curve("secp224r1").g)])
+        with self.assertRaises(TypeError):
+            ec.multi_mul([(1.5, self.curve.g)])
+
+
 class TestKeyPair(unittest.TestCase):
     def setUp(self):
         self.curve = reg.get_curve("brainpoolP160r1")
@@ -122,6 +657,123 @@ class TestKeyPair(unittest.TestCase):
         self.assertTrue(keys.can_sign)
 
 
+class TestCurveParameters(unittest.TestCase):
+    def test_when_curve_parameters_are_changed_then_error_is_raised(self):
+        curve = reg.make_curve("secp192r1")
+        for name in ("name", "a", "b", "field", "g"):
+            with self.assertRaises(AttributeError):
+                setattr(curve, name, 1)
+        with self.assertRaises(AttributeError):
+            curve.field.p = 7
+        curve.mul_method = "binary"
+        self.assertEqual("binary", curve.mul_method)
+
+    def test_when_shared_curve_settings_are_changed_then_error_is_raised(self):
+        curve = reg.get_curve("secp192r1")
+        for name, value in (("mul_method", "binary"), ("wnaf_window", 5), ("backend", None),
+                            ("group_law", (ec.jacobian_double, ec.jacobian_add, ec.jacobian_add_affine))):
+            with self.assertRaises(AttributeError):
+                setattr(curve, name, value)
+        with self.assertRaises(AttributeError):
+            curve.use_backend("generic")
+        with self.assertRaises(AttributeError):
+            curve.precompute_g(8)
+        with self.assertRaises(AttributeError):
+            curve.load_g_table(reg.make_curve("secp192r1").g_table.dump())
+        self.assertEqual(("wnaf", 4, "generic"), (curve.mul_method, curve.wnaf_window, curve.backend.name))
+        self.assertEqual(4, curve.precompute_g().window)
+        batch = ec.make_keypairs(curve, ec.BULK_KEYPAIRS_MIN)
+        self.assertEqual(4, curve.g_table.window)
+        self.assertEqual(batch.priv[-1] * curve.g, ec.Point(curve, batch.x[-1], batch.y[-1]))
+
+
+class TestFixedBaseTable(unittest.TestCase):
+    def setUp(self):
+        self.curve = reg.get_curve("secp192r1")
+        super(TestFixedBaseTable, self).setUp()
+
+    def test_when_generator_is_multiplied_then_result_matches_generic_multiplication(self):
+        g = self.curve.g
+        for k in (1, 2, 15, 16, 0xa78a236d60baec0c5dd41b33a542463a8255391af64c74ee, -7, self.curve.field.n - 1):
+            X, Y, Z = g._mul_binary(g.x, g.y, abs(k))
+            if k < 0:
+                Y = -Y % self.curve.field.p
+            self.assertEqual(g._from_jacobian((X, Y, Z)), k * g)
+
+    def test_when_table_is_dumped_and_loaded_then_it_is_reused(self):
+        data = self.curve.g_table.dump()
+        curve = reg.make_curve("secp192r1")
+        table = curve.load_g_table(data)
+        self.assertIs(table, curve.g_table)
+        self.assertEqual(12345 * self.curve.g, 12345 * curve.g)
+
+    def test_when_point_is_pickled_then_table_is_left_out(self):
+        curve = reg.make_curve("secp192r1")
+        size = len(pickle.dumps(curve.g))
+        curve.precompute_g(8)
+        curve.g_multiples(4)
+        self.assertEqual(size, len(pickle.dumps(curve.g)))
+        loaded = pickle.loads(pickle.dumps(curve.g)).curve
+        self.assertIsNone(loaded._g_table)
+        self.assertEqual({}, loaded._g_multiples)
+        self.assertEqual(12345 * curve.g, 12345 * loaded.g)
+
+    def test_when_table_does_not_match_curve_then_error_is_raised(self):
+        data = self.curve.g_table.dump()
+        with self.assertRaises(ValueError):
+            reg.make_curve("secp224r1").load_g_table(data)
+
+    def test_when_table_is_corrupted_then_error_is_raised(self):
+        data = self.curve.g_table.dump()
+        for i, entry in ((5, data["points"][6]), (20, data["points"][20][::-1]), (44, None),
+                         (len(data["points"]) - 1, [data["points"][-1][0] + self.curve.field.p,
+                                                    data["points"][-1][1]])):
+            corrupted = dict(data, points=list(data["points"]))
+            corrupted["points"][i] = entry
+            with self.assertRaises(ValueError):
+                reg.make_curve("secp192r1").load_g_table(corrupted)
+
+
+class TestKeypairBatch(unittest.TestCase):
+    def setUp(self):
+        self.curve = reg.get_curve("secp224r1")
+        super(TestKeypairBatch, self).setUp()
+
+    def test_when_keypairs_are_generated_in_bulk_then_public_keys_match_private_keys(self):
+        keypairs = ec.make_keypairs(self.curve, 20)
+        self.assertEqual(20, len(keypairs))
+        self.assertEqual(20, len(set(keypairs.priv)))
+        for priv, x, y in zip(keypairs.priv, keypairs.x, keypairs.y):
+            self.assertTrue(1 <= priv < self.curve.field.n)
+            self.assertEqual(priv * self.curve.g, ec.Point(self.curve, x, y))
+        keypair = keypairs[3]
+        self.assertIsInstance(keypair, ec.Keypair)
+        self.assertEqual(keypairs.priv[3], keypair.priv)
+        self.assertEqual(20, len(list(keypairs)))
+        head = keypairs[2:5]
+        self.assertIsInstance(head, ec.KeypairBatch)
+        self.assertEqual(keypairs.priv[2:5], head.priv)
+        self.assertEqual([keypairs[i].pub for i in range(2, 5)], [keypair.pub for keypair in head])
+
+    def test_when_random_scalars_are_drawn_then_they_are_in_range(self):
+        for n in (2, 3, 255, 256, 257, self.curve.field.n):
+            scalars = ec.random_scalars(n, 50)
+            self.assertEqual(50, len(scalars))
+            self.assertTrue(all(0 < k < n for k in scalars))
+
+    def test_when_generator_table_window_is_changed_then_results_match(self):
+        expected = 0xdeadbeef * self.curve.g
+        curve = reg.make_curve("secp224r1")
+        table = curve.precompute_g(6)
+        self.assertEqual(6, table.window)
+        self.assertIs(table, curve.g_table)
+        self.assertEqual(expected, 0xdeadbeef * curve.g)
+
+    def test_when_columns_have_different_lengths_then_error_is_raised(self):
+        with self.assertRaises(ValueError):
+            ec.KeypairBatch(self.curve, [1, 2], [self.curve.g.x], [self.curve.g.y])
+
+
 class TestECDH(unittest.TestCase):
     def setUp(self):
         self.curve = reg.get_curve("secp384r1")
@@ -140,6 +792,27 @@ class TestECDH(unittest.TestCase):
         ecdh3 = ec.ECDH(keypair3)
         self.assertEqual(ecdh3.get_secret(keypair2), ecdh2.get_secret(keypair3))
 
+    def test_when_secrets_are_computed_in_batch_then_they_match_single_secrets(self):
+        for curve in (self.curve, reg.get_curve("secp256k1")):
+            ecdh = ec.ECDH(ec.make_keypair(curve))
+            peers = [ec.make_keypair(curve) for _ in range(5)]
+            peers.append(ec.Keypair(curve, pub=peers[0].pub))
+            self.assertEqual([ecdh.get_secret(peer) for peer in peers], ecdh.get_secrets(peers))
+        # Without a private key, the ones of the peers are used
+        ecdh = ec.ECDH(ec.Keypair(self.curve, pub=peers[1].pub))
+        peers = [ec.make_keypair(self.curve) for _ in range(3)]
+        self.assertEqual([ecdh.get_secret(peer) for peer in peers], ecdh.get_secrets(peers))
+        with self.assertRaises(ValueError):
+            ecdh.get_secrets([ec.Keypair(self.curve, pub=peers[0].pub)])
+
+    def test_when_points_are_multiplied_by_a_shared_scalar_then_results_match(self):
+        for curve in (reg.get_curve("secp256r1"), reg.get_curve("secp256k1")):
+            points = [(i * 0x1234567 + 1) * curve.g for i in range(4)]
+            k = curve.field.n // 3
+            results = ec.mul_shared(curve, k, [(point.x, point.y) for point in points], curve.endomorphism is not None)
+            self.assertEqual([k * point for point in points], ec.normalize_batch(curve, results))
+
+
 class TestSECP256K1(unittest.TestCase):
     def setUp(self):
         self.curve = reg.get_curve("secp256k1")
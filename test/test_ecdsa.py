@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import unittest
+
+import tinyec.ec as ec
+import tinyec.ecdsa as ecdsa
+import tinyec.registry as reg
+
+
+class TestECDSA(unittest.TestCase):
+    def setUp(self):
+        self.curve = reg.get_curve("secp256r1")
+        self.keypair = ec.Keypair(self.curve, 0xC9AFA9D845BA75166B5C215767B1D6934E50C3DB36E89B127B8A622B120F6721)
+        super(TestECDSA, self).setUp()
+
+    def test_known_vectors_for_rfc6979_p256_sha256(self):
+        signer = ecdsa.ECDSA(self.keypair)
+        self.assertEqual((0xEFD48B2AACB6A8FD1140DD9CD45E81D69D2C877B56AAF991C34D0EA84EAF3716,
+                          0xF7CB1C942D657C41D436C7A1B6E29F65F3E900DBB9AFF4064DC4AB2F843ACDA8), signer.sign(b"sample"))
+        self.assertEqual((0xF1ABB023518351CD71D881567B1EA663ED3EFCF6C5132B354F28D3B0B7D38367,
+                          0x019F4113742A2B14BD25926B49C649155F267E60D3814B4C0CC84250E46F0083), signer.sign(b"test"))
+        nonce = next(ecdsa.rfc6979_nonces(self.keypair.priv, hashlib.sha256(b"sample").digest(), self.curve.field.n))
+        self.assertEqual(0xA6E3C57DD01ABE90086538398355DD4C3B17AA873382B0F24D6129493D8AAD60, nonce)
+
+    def test_when_message_is_signed_then_signature_is_verified(self):
+        for name in ("secp192r1", "secp256k1", "brainpoolP256r1", "secp521r1"):
+            curve = reg.get_curve(name)
+            keypair = ec.make_keypair(curve)
+            signature = ecdsa.ECDSA(keypair, hashlib.sha512).sign(b"message")
+            verifier = ecdsa.ECDSA(ec.Keypair(curve, pub=keypair.pub), hashlib.sha512)
+            self.assertTrue(verifier.verify(b"message", signature))
+            self.assertFalse(verifier.verify(b"massage", signature))
+            self.assertFalse(verifier.verify(b"message", (signature[0], signature[1] + 1)))
+
+    def test_when_signature_is_out_of_range_then_it_is_rejected(self):
+        signer = ecdsa.ECDSA(self.keypair)
+        r, s = signer.sign(b"sample")
+        n = self.curve.field.n
+        for signature in ((0, s), (r, 0), (r + n, s), (r, s + n)):
+            self.assertFalse(signer.verify(b"sample", signature))
+
+    def test_when_private_key_is_missing_then_error_is_raised(self):
+        with self.assertRaises(ValueError):
+            ecdsa.ECDSA(ec.Keypair(self.curve, pub=self.keypair.pub)).sign(b"sample")
+
+    def test_when_curve_uses_ladder_then_signatures_are_the_same(self):
+        curve = reg.make_curve("secp256r1")
+        curve.mul_method = "ladder"
+        keypair = ec.Keypair(curve, self.keypair.priv)
+        self.assertEqual(ecdsa.ECDSA(self.keypair).sign(b"sample"), ecdsa.ECDSA(keypair).sign(b"sample"))
+
+
+class TestBatchVerification(unittest.TestCase):
+    def test_when_signatures_are_verified_in_batch_then_each_result_is_returned(self):
+        items = []
+        expected = []
+        for name in ("secp256r1", "secp256k1"):
+            curve = reg.get_curve(name)
+            keypairs = [ec.make_keypair(curve) for _ in range(3)]
+            for i in range(9):
+                keypair = keypairs[i % 3]
+                message = b"message %d" % i
+                signature = ecdsa.ECDSA(keypair).sign(message)
+                if i % 4 == 3:
+                    signature = (signature[0], signature[1] ^ 1)
+                items.append((keypair if i % 2 else keypair.pub, message, signature))
+                expected.append(i % 4 != 3)
+        off_curve = ec.Point(curve, curve.g.x, curve.g.y + 1, check=False)
+        items.append((off_curve, b"message", (1, 1)))
+        expected.append(False)
+        items.append((ec.Inf(curve), b"message", (1, 1)))
+        expected.append(False)
+        self.assertEqual(expected, ecdsa.verify_batch(items))
+        self.assertEqual([], ecdsa.verify_batch([]))
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+import random
+import unittest
+
+import tinyec.ec as ec
+import tinyec.field as fields
+import tinyec.registry as reg
+
+
+class TestBackends(unittest.TestCase):
+    def test_when_elements_are_combined_then_results_match_plain_modular_arithmetic(self):
+        rand = random.Random(0)
+        for name in ("brainpoolP256r1", "secp256r1", "secp256k1", "secp521r1"):
+            p = reg.EC_CURVE_REGISTRY[name]["p"]
+            for backend in fields.BACKENDS.values():
+                try:
+                    field = backend(p)
+                except ValueError:
+                    continue
+                for _ in range(20):
+                    x, y = rand.randrange(-p, 2 * p), rand.randrange(-p, 2 * p)
+                    fx, fy = field.to_field(x), field.to_field(y)
+                    self.assertEqual(x * y % p, field.from_field(field.mul(fx, fy)))
+                    self.assertEqual(x * x % p, field.from_field(field.sqr(fx)))
+                    self.assertEqual((x + y) % p, field.from_field(field.add(fx, fy)))
+                    self.assertEqual((x - y) % p, field.from_field(field.sub(fx, fy)))
+                    self.assertEqual(-x % p, field.from_field(field.neg(fx)))
+                    self.assertEqual(1, field.from_field(field.inv(fx)) * x % p)
+
+    def test_when_prime_has_not_the_required_form_then_error_is_raised(self):
+        brainpool = reg.EC_CURVE_REGISTRY["brainpoolP256r1"]["p"]
+        with self.assertRaises(ValueError):
+            fields.SolinasField(brainpool)
+        with self.assertRaises(ValueError):
+            fields.MersenneField(reg.EC_CURVE_REGISTRY["secp256k1"]["p"])
+        with self.assertRaises(ValueError):
+            fields.MontgomeryField(2 ** 127)
+
+    def test_when_backend_is_selected_then_mersenne_primes_get_their_own(self):
+        self.assertEqual("mersenne", fields.select_backend(2 ** 521 - 1).name)
+        self.assertEqual("generic", fields.select_backend(reg.EC_CURVE_REGISTRY["secp256r1"]["p"]).name)
+        self.assertEqual("mersenne", reg.get_curve("secp521r1").backend.name)
+        self.assertEqual("generic", reg.get_curve("brainpoolP512r1").backend.name)
+
+
+class TestMersenneGroupLaw(unittest.TestCase):
+    def setUp(self):
+        self.curve = reg.make_curve("secp521r1")
+        self.generic = reg.make_curve("secp521r1")
+        self.generic.use_backend("generic")
+        super(TestMersenneGroupLaw, self).setUp()
+
+    def test_when_points_are_combined_then_results_match_generic_group_law(self):
+        p1 = 0x123456789abcdef * self.curve.g
+        p2 = ec.Point(self.generic, p1.x, p1.y)
+        k = self.curve.field.n // 7
+        for method in ec.MUL_METHODS:
+            self.assertEqual(p2.mul(k, method).x, p1.mul(k, method).x)
+            self.assertEqual(p2.mul(-k, method).y, p1.mul(-k, method).y)
+        self.assertEqual((p2 + self.generic.g).x, (p1 + self.curve.g).x)
+        self.assertEqual((p2 - self.generic.g).y, (p1 - self.curve.g).y)
+        self.assertEqual((p2 + p2).x, (p1 + p1).x)
+        terms = [(k + i, (i + 2) * self.curve.g) for i in range(5)]
+        self.assertEqual(ec.multi_mul([(k, ec.Point(self.generic, P.x, P.y)) for k, P in terms]).x,
+                         ec.multi_mul(terms).x)
+
+    def test_when_unknown_backend_is_used_then_error_is_raised(self):
+        with self.assertRaises(ValueError):
+            self.curve.use_backend("unknown")
+
+    def test_when_backend_is_built_for_another_prime_then_error_is_raised(self):
+        curve = reg.make_curve("secp256r1")
+        with self.assertRaises(ValueError):
+            curve.use_backend(fields.MersenneField(2 ** 521 - 1))
+        self.assertEqual("generic", curve.backend.name)
+        self.assertEqual(5 * reg.get_curve("secp256r1").g, 5 * curve.g)
+
+    def test_when_backend_has_no_group_law_then_error_is_raised(self):
+        curve = reg.make_curve("secp256r1")
+        with self.assertRaises(ValueError):
+            curve.use_backend("solinas")
+        with self.assertRaises(ValueError):
+            curve.use_backend(fields.MontgomeryField(curve.field.p))
+        self.assertEqual("generic", curve.backend.name)
+
+    def test_when_curve_is_pickled_then_its_group_law_is_rebuilt(self):
+        keypair = ec.make_keypair(reg.get_curve("secp521r1"))
+        loaded = pickle.loads(pickle.dumps(keypair))
+        self.assertEqual(keypair.pub, loaded.pub)
+        self.assertEqual("mersenne", loaded.curve.backend.name)
+        self.assertEqual(keypair.priv * loaded.curve.g, loaded.priv * loaded.pub.curve.g)
+        self.assertEqual(3 * keypair.pub, 3 * loaded.pub)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import tinyec.ec as ec
+import tinyec.instrument as instrument
+import tinyec.registry as reg
+
+
+class TestRecorder(unittest.TestCase):
+    def setUp(self):
+        self.curve = reg.get_curve("secp256r1")
+        self.keypair = ec.make_keypair(self.curve)
+        self.peer = ec.make_keypair(self.curve)
+
+    def test_when_no_recorder_is_active_then_group_law_is_not_wrapped(self):
+        self.assertIsNone(ec._recorder)
+        self.assertIs(self.curve._group_law, self.curve.group_law)
+
+    def test_when_secret_is_computed_then_operations_are_counted(self):
+        with instrument.Recorder() as recorder:
+            secret = ec.ECDH(self.keypair).get_secret(self.peer)
+        self.assertIsNone(ec._recorder)
+        self.assertEqual(ec.ECDH(self.keypair).get_secret(self.peer), secret)
+        counts = recorder.counts["secp256r1"]
+        self.assertGreaterEqual(counts["double"], self.curve.field.n.bit_length() - 8)
+        self.assertGreater(counts["add_affine"], 0)
+        # One for the table of odd multiples of the peer key, one for the result
+        self.assertEqual(2, counts["inversion"])
+        self.assertGreater(counts["field_mul"], 8 * counts["double"])
+        timings = recorder.timings["secp256r1"]
+        self.assertEqual(1, timings["get_secret"]["calls"])
+        self.assertEqual(1, timings["mul"]["calls"])
+        self.assertGreater(timings["get_secret"]["seconds"], 0)
+
+    def test_when_batch_is_normalized_then_inversions_do_not_depend_on_batch_size(self):
+        peers = [ec.make_keypair(self.curve) for _ in range(8)]
+        with instrument.Recorder() as single:
+            ec.ECDH(self.keypair).get_secrets(peers[:1])
+        with instrument.Recorder() as batch:
+            ec.ECDH(self.keypair).get_secrets(peers)
+        self.assertEqual(single.counts["secp256r1"]["inversion"], batch.counts["secp256r1"]["inversion"])
+        self.assertEqual(1, batch.timings["secp256r1"]["get_secrets"]["calls"])
+
+    def test_when_ladder_is_used_then_complete_additions_are_counted(self):
+        curve = reg.make_curve("secp256r1")
+        curve.mul_method = "ladder"
+        with instrument.Recorder() as recorder:
+            curve.g * 12345
+        counts = recorder.counts["secp256r1"]
+        self.assertEqual(2 * (curve.field.n.bit_length() + ec.LADDER_BLINDING_BITS), counts["complete_add"])
+        self.assertEqual(1, counts["inversion"])
+
+    def test_when_recorder_exits_then_hook_gets_a_snapshot(self):
+        snapshots = []
+        with instrument.Recorder(hook=snapshots.append) as recorder:
+            self.curve.g + self.peer.pub
+        self.assertEqual([recorder.snapshot()], snapshots)
+        self.assertEqual(1, snapshots[0]["counts"]["secp256r1"]["add_affine"])
+        self.assertEqual(1, snapshots[0]["timings"]["secp256r1"]["add"]["calls"])
+
+    def test_when_recorders_are_nested_then_outer_one_is_restored(self):
+        with instrument.Recorder() as outer:
+            with instrument.Recorder() as inner:
+                self.curve.g + self.peer.pub
+            self.assertIs(outer, ec._recorder)
+        self.assertEqual({}, dict(outer.counts))
+        self.assertEqual(1, inner.counts["secp256r1"]["add_affine"])
+
+    def test_when_group_law_is_replaced_then_recorder_wraps_new_law(self):
+        curve = reg.make_curve("secp256r1")
+        with instrument.Recorder() as recorder:
+            curve.g + self.peer.pub
+            curve.group_law = (ec.jacobian_double, ec.jacobian_add, ec.jacobian_add_affine)
+            self.assertIs(ec.jacobian_add_affine, curve._group_law[2])
+            self.assertEqual(curve.g + self.peer.pub, self.curve.g + self.peer.pub)
+        self.assertEqual(3, recorder.counts["secp256r1"]["add_affine"])
+
+
+if __name__ == "__main__":
+    unittest.main()
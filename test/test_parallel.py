@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import tinyec.ec as ec
+import tinyec.parallel as parallel
+import tinyec.registry as reg
+
+
+class TestParallelExecutor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = parallel.ParallelExecutor(max_workers=2, chunk_size=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+
+    def setUp(self):
+        self.curve = reg.get_curve("secp192r1")
+        super(TestParallelExecutor, self).setUp()
+
+    def test_when_jobs_are_run_then_results_are_returned_in_order(self):
+        custom = ec.Curve(2, 3, ec.SubGroup(97, (3, 6), 5, 1))
+        jobs = [(k * 0x9e3779b97f4a7c15, (k % 5 + 1) * self.curve.g) for k in range(1, 15)]
+        jobs += [(-3, self.curve.g), (0, self.curve.g), (2, custom.g), (5, custom.g), (0xabcdef, self.curve.g)]
+        expected = [k * point for k, point in jobs]
+        self.assertEqual(expected, list(self.executor.mul(jobs)))
+        self.assertEqual([ec.Inf(self.curve)], list(self.executor.mul([(2, ec.Inf(self.curve))])))
+
+    def test_when_secrets_are_computed_then_they_match_ecdh(self):
+        ecdh = ec.ECDH(ec.make_keypair(self.curve))
+        peers = [ec.make_keypair(self.curve) for _ in range(7)]
+        self.assertEqual([ecdh.get_secret(peer) for peer in peers], list(self.executor.get_secrets(ecdh, peers)))
+        self.assertEqual([ecdh.get_secret(peer) for peer in peers], list(ecdh.get_secrets(peers, self.executor)))
+        array = ec.PointArray.from_points(self.curve, [peer.pub for peer in peers])
+        self.assertEqual([ecdh.get_secret(peer) for peer in peers], list(ecdh.get_secrets(array, self.executor)))
+
+    def test_when_curve_uses_ladder_then_workers_use_it_as_well(self):
+        curve = reg.make_curve("secp192r1")
+        curve.mul_method = "ladder"
+        jobs = [(k * 0x9e3779b97f4a7c15, (k + 1) * curve.g) for k in range(5)]
+        self.assertEqual([k * point for k, point in jobs], list(self.executor.mul(jobs)))
+        with self.assertRaises(ValueError):
+            list(self.executor.mul([(3, ec.Point(curve, 1, 1, check=False))]))
+
+    def test_when_curve_instances_are_mixed_then_each_keeps_its_mul_method(self):
+        # Instances of the same curve are equal, but may differ in mul_method
+        curve = reg.make_curve("secp192r1")
+        curve.mul_method = "ladder"
+        jobs = [(5, self.curve.g), (7, curve.g), (9, curve.g), (11, self.curve.g)]
+        chunks = list(self.executor._chunks(jobs))
+        self.assertEqual([[5], [7, 9], [11]], [[k for k, _ in chunk] for _, chunk in chunks])
+        self.assertEqual([self.curve, curve, self.curve], [chunk_curve for chunk_curve, _ in chunks])
+        self.assertTrue(all(chunk_curve is point.curve for chunk_curve, chunk in chunks for _, point in chunk))
+        results = list(self.executor.mul(jobs))
+        self.assertEqual([k * point for k, point in jobs], results)
+        self.assertTrue(all(result.curve is point.curve for result, (_, point) in zip(results, jobs)))
+
+    def test_when_curve_is_registered_then_its_name_is_used_as_key(self):
+        self.assertEqual("secp192r1", parallel.curve_key(self.curve))
+        custom = ec.Curve(2, 3, ec.SubGroup(97, (3, 6), 5, 1), "secp192r1")
+        self.assertEqual(custom, parallel.curve_from_key(parallel.curve_key(custom)))
+
+    def test_when_scalar_is_not_an_int_then_error_is_raised(self):
+        with self.assertRaises(TypeError):
+            list(self.executor.mul([(1.5, self.curve.g)]))
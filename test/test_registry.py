@@ -17,3 +17,35 @@ class TestGetCurve(unittest.TestCase):
         self.assertIsInstance(curve, ec.Curve)
         self.assertEqual(curve_name, curve.name)
         self.assertEqual(reg.EC_CURVE_REGISTRY[curve_name]["n"], curve.field.n)
+
+    def test_when_curve_is_requested_twice_then_same_instance_is_returned(self):
+        curve = reg.get_curve("secp256r1")
+        self.assertIs(curve, reg.get_curve("SECP256R1"))
+        self.assertIsNot(curve, reg.make_curve("secp256r1"))
+        self.assertEqual(curve, reg.make_curve("secp256r1"))
+
+    def test_when_alias_is_provided_then_registry_curve_is_returned(self):
+        curve = reg.get_curve("secp256r1")
+        for alias in ("prime256v1", "P-256", "p256", "NISTP256", "secp256-r1"):
+            self.assertIs(curve, reg.get_curve(alias))
+        self.assertEqual("secp521r1", reg.get_curve("P-521").name)
+
+    def test_when_registry_is_extended_then_new_curve_is_found(self):
+        reg.EC_CURVE_REGISTRY["test97"] = {"p": 97, "a": 2, "b": 3, "g": (3, 6), "n": 5, "h": 1}
+        reg.EC_CURVE_ALIASES["t-97"] = "test97"
+        try:
+            self.assertEqual(5, reg.get_curve("T97").field.n)
+        finally:
+            del reg.EC_CURVE_REGISTRY["test97"]
+            del reg.EC_CURVE_ALIASES["t-97"]
+            reg._curve_cache.pop("test97", None)
+        with self.assertRaises(ValueError):
+            reg.get_curve("test97")
+
+    def test_when_parameters_are_missing_then_error_is_raised(self):
+        reg.EC_CURVE_REGISTRY["test97"] = {"p": 97, "a": 2, "b": 3, "g": (3, 6), "n": 5}
+        try:
+            with self.assertRaises(RuntimeError):
+                reg.get_curve("test97")
+        finally:
+            del reg.EC_CURVE_REGISTRY["test97"]
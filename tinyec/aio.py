@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+# asyncio front end: key generations and DH secrets are run by an executor, out of the event loop, and
+# the requests made during the same iteration of the loop are coalesced into batches. Batches share the
+# final normalization, and the recoding of a private key used by several secrets
+import asyncio
+import collections
+import functools
+
+import tinyec.ec as ec
+import tinyec.parallel as parallel
+
+# Largest number of requests run as a single executor job
+MAX_BATCH = 64
+
+
+def _secrets_chunk(key, jobs, hardened):
+    # Same as tinyec.parallel._mul_chunk, for jobs that do not necessarily share a scalar: the ones
+    # sharing one are multiplied together, the others one by one with a single final normalization
+    by_scalar = collections.OrderedDict()
+    for i, job in enumerate(jobs):
+        by_scalar.setdefault(job[0], []).append(i)
+    chunks, singles = [], []
+    for indices in by_scalar.values():
+        if len(indices) > 1 and not hardened:
+            chunks.append(indices)
+        else:
+            singles.extend(indices)
+    if singles:
+        chunks.append(singles)
+    results = [None] * len(jobs)
+    for indices in chunks:
+        for i, affine in zip(indices, parallel._mul_chunk(key, [jobs[i] for i in indices], hardened)):
+            results[i] = affine
+    return results
+
+
+def _keypairs_chunk(key, jobs, hardened):
+    # One (priv, x, y) keypair per job
+    curve = parallel._worker_curve(key)
+    if hardened:
+        keypairs = [ec.make_keypair(curve, hardened=True) for _ in jobs]
+    else:
+        keypairs = ec.make_keypairs(curve, len(jobs))
+    return [(keypair.priv, keypair.pub.x, keypair.pub.y) for keypair in keypairs]
+
+
+class Coalescer(object):
+    # Runs requests on executor, a concurrent.futures executor (None for the default one of the event
+    # loop, a thread pool), in batches of at most max_batch requests. A batch is submitted at the next
+    # iteration of the event loop, or as soon as it is full. Process pools run batches in parallel,
+    # while threads only keep the event loop responsive
+    def __init__(self, executor=None, max_batch=MAX_BATCH):
+        if max_batch < 1:
+            raise ValueError("Batch size must be positive")
+        self.executor = executor
+        self.max_batch = max_batch
+        self._pending = {}
+
+    def submit(self, func, key, hardened, job):
+        # Future of the result of job, computed by func(key, jobs, hardened) along with the other jobs
+        # of its batch
+        loop = _running_loop()
+        future = loop.create_future()
+        group = (loop, func, key, hardened)
+        batch = self._pending.get(group)
+        if batch is None:
+            batch = self._pending[group] = []
+            loop.call_soon(self._flush, group, batch)
+        batch.append((job, future))
+        if len(batch) >= self.max_batch:
+            self._flush(group, batch)
+        return future
+
+    def _flush(self, group, batch):
+        if self._pending.get(group) is not batch:
+            # Already submitted when it got full
+            return
+        del self._pending[group]
+        self._run(group, batch)
+
+    def _run(self, group, batch):
+        loop, func, key, hardened = group
+        try:
+            done = loop.run_in_executor(self.executor, func, key, [job for job, _ in batch], hardened)
+        except Exception as error:
+            # Such as a shut down or broken executor: run from call_soon, the error would only be logged
+            # by the event loop, leaving the requests of the batch pending
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        done.add_done_callback(functools.partial(self._done, group, batch))
+
+    def _done(self, group, batch, done):
+        if done.cancelled():
+            for _, future in batch:
+                future.cancel()
+            return
+        error = done.exception()
+        if error is not None:
+            if len(batch) > 1:
+                # Such as an invalid point in hardened mode: the jobs are run one by one, so that the
+                # error only reaches the request it belongs to
+                for item in batch:
+                    self._run(group, [item])
+                return
+            if not batch[0][1].done():
+                batch[0][1].set_exception(error)
+            return
+        for (_, future), result in zip(batch, done.result()):
+            if not future.done():
+                future.set_result(result)
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except AttributeError:
+        return asyncio.get_event_loop()
+
+
+_default_coalescer = None
+
+
+def set_executor(executor, max_batch=MAX_BATCH):
+    # Executor used when no coalescer is given, such as a concurrent.futures.ProcessPoolExecutor
+    global _default_coalescer
+    _default_coalescer = Coalescer(executor, max_batch)
+
+
+def default_coalescer():
+    global _default_coalescer
+    if _default_coalescer is None:
+        _default_coalescer = Coalescer()
+    return _default_coalescer
+
+
+async def get_secret(ecdh, keypair, coalescer=None):
+    # Same as ecdh.get_secret(keypair)
+    k, point = ecdh.secret_operands(keypair)
+    if not isinstance(point, ec.Point) or not (isinstance(k, int) or isinstance(k, ec.LONG_TYPE)):
+        return k * point
+    curve = point.curve
+    affine = await (coalescer or default_coalescer()).submit(_secrets_chunk, parallel.curve_key(curve),
+                                                            curve.mul_method == "ladder", (k, point.x, point.y))
+    if affine is None:
+        return ec.Inf(curve)
+    return ec.Point(curve, affine[0], affine[1], check=False)
+
+
+async def make_keypair(curve, hardened=False, coalescer=None):
+    # Same as tinyec.ec.make_keypair(curve, hardened)
+    priv, x, y = await (coalescer or default_coalescer()).submit(
+        _keypairs_chunk, parallel.curve_key(curve), hardened or curve.mul_method == "ladder", None)
+    return ec.Keypair(curve, priv, ec.Point(curve, x, y, check=False))
@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+
+import tinyec.ec as ec
+import tinyec.registry as reg
+
+
+def _egcd_recursive(a, b):
+    # Former recursive implementation, kept as a baseline
+    if a == 0:
+        return b, 0, 1
+    else:
+        g, y, x = _egcd_recursive(b % a, a)
+        return g, x - (b // a) * y, y
+
+
+def _mod_inv_recursive(a, p):
+    g, x, y = _egcd_recursive(a, p)
+    return x % p
+
+
+def _curves_by_size():
+    return sorted(reg.EC_CURVE_REGISTRY.items(), key=lambda item: (item[1]["p"].bit_length(), item[0]))
+
+
+def timeit_per_op(func, values, repeat=3):
+    # Best time of repeat runs, per call to func
+    timer = timeit.Timer(lambda: [func(value) for value in values])
+    return min(timer.repeat(repeat=repeat, number=1)) / len(values)
+
+
+def percentile(values, q):
+    # Nearest rank percentile of values, for q in [0, 100]
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered), int(math.ceil(q / 100.0 * len(ordered)))) - 1)]
+
+
+# Each sample of measure lasts at least this long, in seconds, so that fast operations are timed over
+# many calls
+MIN_SAMPLE_TIME = 0.002
+
+
+def measure(func, samples=20):
+    # Ops per second (from the median) and percentiles of the time per call of func, over samples samples
+    start = timeit.default_timer()
+    func()
+    number = max(1, int(MIN_SAMPLE_TIME / max(timeit.default_timer() - start, 1e-9)))
+    timings = []
+    for _ in range(samples):
+        start = timeit.default_timer()
+        for _ in range(number):
+            func()
+        timings.append((timeit.default_timer() - start) / number)
+    median = percentile(timings, 50)
+    return {"ops_per_sec": 1 / median, "p50": median, "p90": percentile(timings, 90),
+            "p99": percentile(timings, 99), "samples": samples, "number": number}
+
+
+def bench_ops(curve_names=None, samples=20):
+    # Core operations on each registry curve. Scalars are drawn once, and cycled through
+    results = {}
+    for name in curve_names or [item[0] for item in _curves_by_size()]:
+        curve = reg.get_curve(name)
+        n, p = curve.field.n, curve.field.p
+        scalars = itertools.cycle([random.randrange(1, n) for _ in range(16)])
+        values = itertools.cycle([random.randrange(1, p) for _ in range(16)])
+        P, Q = next(scalars) * curve.g, next(scalars) * curve.g
+        ecdh = ec.ECDH(ec.make_keypair(curve))
+        peer = ec.make_keypair(curve)
+        curve.precompute_g()
+        ops = [("add", lambda: P + Q),
+               ("double", lambda: P + P),
+               ("mul_fixed", lambda: curve.g * next(scalars)),
+               ("mul_variable", lambda: P * next(scalars)),
+               ("make_keypair", lambda: ec.make_keypair(curve)),
+               ("get_secret", lambda: ecdh.get_secret(peer)),
+               ("mod_inv", lambda: ec.mod_inv(next(values), p)),
+               ("get_curve", lambda: reg.get_curve(name))]
+        results[name] = dict((op, measure(func, samples)) for op, func in ops)
+    return results
+
+
+OPS = ("add", "double", "mul_fixed", "mul_variable", "make_keypair", "get_secret", "mod_inv", "get_curve")
+
+
+def print_ops(results):
+    print("operations, microseconds per operation")
+    print("%-18s %14s %12s %10s %10s %10s" % ("curve", "op", "ops/s", "p50", "p90", "p99"))
+    for name in sorted(results, key=lambda name: (reg.EC_CURVE_REGISTRY[name]["p"].bit_length(), name)):
+        for op in OPS:
+            timing = results[name][op]
+            print("%-18s %14s %12.1f %10.2f %10.2f %10.2f" % (name, op, timing["ops_per_sec"], timing["p50"] * 1e6,
+                                                             timing["p90"] * 1e6, timing["p99"] * 1e6))
+
+
+def compare_ops(results, baseline, threshold=0.1):
+    # (curve, op, baseline ops/s, ops/s) for each operation of results more than threshold (a fraction)
+    # slower than in baseline. Operations missing from either side are ignored
+    regressions = []
+    for name in sorted(results):
+        for op in sorted(results[name]):
+            reference = baseline.get(name, {}).get(op)
+            if reference is None:
+                continue
+            current = results[name][op]["ops_per_sec"]
+            if current < reference["ops_per_sec"] * (1 - threshold):
+                regressions.append((name, op, reference["ops_per_sec"], current))
+    return regressions
+
+
+def bench_mod_inv(count=200):
+    backends = dict(ec.MOD_INV_BACKENDS)
+    backends["recursive"] = _mod_inv_recursive
+    results = []
+    for name, params in _curves_by_size():
+        p = params["p"]
+        values = [random.randrange(1, p) for _ in range(count)]
+        timings = {}
+        for backend, inverse in backends.items():
+            timings[backend] = timeit_per_op(lambda value: inverse(value, p), values)
+        results.append((name, p.bit_length(), timings))
+    return results
+
+
+def print_mod_inv(results):
+    backends = sorted(results[0][2])
+    print("mod_inv, microseconds per inversion")
+    print("%-18s %5s " % ("curve", "bits") + " ".join("%10s" % backend for backend in backends))
+    for name, bits, timings in results:
+        print("%-18s %5d " % (name, bits) + " ".join("%10.2f" % (timings[backend] * 1e6) for backend in backends))
+
+
+def bench_parallel(curve_name="secp256r1", count=2000, workers=None, chunk_size=64):
+    # Throughput of variable base multiplications through ParallelExecutor, for an increasing number
+    # of worker processes. The serial, in process, throughput is reported with 0 workers
+    import tinyec.parallel as parallel
+    curve = reg.get_curve(curve_name)
+    points = [random.randrange(1, curve.field.n) * curve.g for _ in range(16)]
+    jobs = [(random.randrange(1, curve.field.n), points[i % len(points)]) for i in range(count)]
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = [1]
+        while workers[-1] * 2 <= cpus:
+            workers.append(workers[-1] * 2)
+    start = time.time()
+    for k, point in jobs:
+        k * point
+    results = [(0, count / (time.time() - start))]
+    for count_workers in workers:
+        with parallel.ParallelExecutor(max_workers=count_workers, chunk_size=chunk_size) as executor:
+            # Warm the pool up, so that process startup is not accounted for
+            list(executor.mul(jobs[:count_workers * chunk_size]))
+            start = time.time()
+            for _ in executor.mul(jobs):
+                pass
+            results.append((count_workers, count / (time.time() - start)))
+    return curve_name, results
+
+
+def print_parallel(results):
+    curve_name, timings = results
+    print("parallel scalar multiplications on %s" % curve_name)
+    print("%8s %12s %8s" % ("workers", "ops/s", "speedup"))
+    for workers, throughput in timings:
+        print("%8d %12.1f %8.2f" % (workers, throughput, throughput / timings[0][1]))
+
+
+def bench_field(count=200):
+    # Field multiplication (product and reduction) through each applicable backend, the generic one
+    # being plain %. The backend selected by default for the curve is reported as well
+    import tinyec.field as fields
+    results = []
+    for name, params in _curves_by_size():
+        p = params["p"]
+        values = [(random.randrange(p), random.randrange(p)) for _ in range(count)]
+        timings = {}
+        for backend_name, backend in fields.BACKENDS.items():
+            try:
+                field = backend(p)
+            except ValueError:
+                continue
+            elements = [(field.to_field(x), field.to_field(y)) for x, y in values]
+            timings[backend_name] = timeit_per_op(lambda xy: field.mul(xy[0], xy[1]), elements)
+        results.append((name, p.bit_length(), fields.select_backend(p).name, timings))
+    return results
+
+
+def print_field(results):
+    import tinyec.field as fields
+    backends = sorted(fields.BACKENDS)
+    print("field multiplication, microseconds per operation (- when the prime has not the required form)")
+    print("%-18s %5s %10s " % ("curve", "bits", "selected") + " ".join("%10s" % backend for backend in backends))
+    for name, bits, selected, timings in results:
+        print("%-18s %5d %10s " % (name, bits, selected) +
+              " ".join("%10.3f" % (timings[backend] * 1e6) if backend in timings else "%10s" % "-"
+                       for backend in backends))
+
+
+def bench_hardened(curve_names=("secp256r1", "secp256k1", "secp384r1"), count=20):
+    # Cost of the ladder method next to the default (fast) one, for key generation (generator
+    # multiplications) and DH secrets (variable base multiplications)
+    results = []
+    for name in curve_names:
+        curve = reg.get_curve(name)
+        point = random.randrange(1, curve.field.n) * curve.g
+        scalars = [random.randrange(1, curve.field.n) for _ in range(count)]
+        timings = {"keygen": (timeit_per_op(lambda k: curve.g * k, scalars),
+                              timeit_per_op(lambda k: curve.g.mul(k, "ladder"), scalars)),
+                   "ecdh": (timeit_per_op(lambda k: point * k, scalars),
+                            timeit_per_op(lambda k: point.mul(k, "ladder"), scalars))}
+        results.append((name, timings))
+    return results
+
+
+def print_hardened(results):
+    print("hardened (ladder) mode cost, milliseconds per operation")
+    print("%-18s %8s %10s %10s %8s" % ("curve", "op", "fast", "hardened", "ratio"))
+    for name, timings in results:
+        for op in ("keygen", "ecdh"):
+            fast, hardened = timings[op]
+            print("%-18s %8s %10.3f %10.3f %8.2f" % (name, op, fast * 1e3, hardened * 1e3, hardened / fast))
+
+
+class _DictPoint(object):
+    # Former layout of Point, kept as a baseline: a __dict__ per instance, holding a copy of p
+    def __init__(self, curve, x, y):
+        self.curve = curve
+        self.x = x
+        self.y = y
+        self.p = curve.field.p
+        self.on_curve = curve.on_curve(x, y)
+
+
+def bench_points(curve_name="secp256r1", count=1000000):
+    # Memory held by count points, and construction throughput, for the former dict based layout, user
+    # constructed (checked) points, internally derived (unchecked) points, and a PointArray. Coordinates
+    # are shared between all Point layouts, so that only the per point overhead is measured
+    curve = reg.get_curve(curve_name)
+    coordinates = [(P.x, P.y) for P in ec.normalize_batch(curve, [curve.g_table.mul(k) for k in range(1, 1025)])]
+    coordinates = [coordinates[i % len(coordinates)] for i in range(count)]
+    builders = [("dict", lambda x, y: _DictPoint(curve, x, y)),
+                ("checked", lambda x, y: ec.Point(curve, x, y)),
+                ("derived", lambda x, y: ec._derived_point(curve, x, y))]
+    results = []
+    for name, build in builders:
+        tracemalloc.start()
+        points = [build(x, y) for x, y in coordinates]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del points
+        # Throughput is measured again without tracing, which slows allocations down
+        start = time.time()
+        points = [build(x, y) for x, y in coordinates]
+        elapsed = time.time() - start
+        del points
+        results.append((name, float(size) / count, count / elapsed))
+    # Packed coordinates, no Point instance being held
+    tracemalloc.start()
+    array = ec.PointArray.from_coordinates(curve, coordinates)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del array
+    start = time.time()
+    ec.PointArray.from_coordinates(curve, coordinates)
+    results.append(("array", float(size) / count, count / (time.time() - start)))
+    return curve_name, count, results
+
+
+def print_points(results):
+    curve_name, count, timings = results
+    print("%d points on %s" % (count, curve_name))
+    print("%8s %14s %12s" % ("layout", "bytes/point", "points/s"))
+    for name, size, throughput in timings:
+        print("%8s %14.1f %12.1f" % (name, size, throughput))
+
+
+BENCHMARKS = {"field": (bench_field, print_field),
+              "hardened": (bench_hardened, print_hardened),
+              "mod_inv": (bench_mod_inv, print_mod_inv),
+              "ops": (bench_ops, print_ops),
+              "parallel": (bench_parallel, print_parallel),
+              "points": (bench_points, print_points)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tinyec.bench", description="tinyec benchmarks")
+    parser.add_argument("benchmarks", nargs="*", help="benchmarks to run among %s, all of them by default" %
+                        ", ".join(sorted(BENCHMARKS)))
+    parser.add_argument("--curves", nargs="+", help="curves of the ops benchmark, all registry curves by default")
+    parser.add_argument("--samples", type=int, default=20, help="samples per operation of the ops benchmark")
+    parser.add_argument("--json", metavar="PATH", help="writes results as JSON to PATH, - for stdout")
+    parser.add_argument("--baseline", metavar="PATH", help="JSON results to compare the ops benchmark to. "
+                        "Exits with status 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="slowdown reported as a regression, as a fraction (default 0.1)")
+    args = parser.parse_args(argv)
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark %s" % name)
+    if args.curves:
+        # Aliases are accepted, and results reported under registry names
+        curves = []
+        for name in args.curves:
+            try:
+                name = reg.get_curve(name).name
+            except ValueError:
+                parser.error("unknown curve %s" % name)
+            if name not in curves:
+                curves.append(name)
+        args.curves = curves
+    names = args.benchmarks or sorted(BENCHMARKS)
+    if args.baseline and "ops" not in names:
+        parser.error("--baseline requires the ops benchmark")
+    quiet = args.json == "-"
+    results = {}
+    for name in names:
+        run, report = BENCHMARKS[name]
+        results[name] = run(args.curves, args.samples) if name == "ops" else run()
+        if not quiet:
+            report(results[name])
+            print()
+    if args.json:
+        data = json.dumps({"benchmarks": results}, indent=2, sort_keys=True)
+        if quiet:
+            print(data)
+        else:
+            with open(args.json, "w") as f:
+                f.write(data)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["benchmarks"].get("ops", {})
+        regressions = compare_ops(results["ops"], baseline, args.threshold)
+        for name, op, reference, current in regressions:
+            print("regression: %s %s %.1f ops/s -> %.1f ops/s (%+.1f%%)" % (
+                name, op, reference, current, (current / reference - 1) * 100), file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
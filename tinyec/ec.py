@@ -1,40 +1,612 @@
 # -*- coding: utf-8 -*-
+import binascii
+import functools
+import mmap
+import os
 import random
-
+import timeit
 import warnings
 
+import tinyec.field as fields
+
 # Python3 compatibility
 try:
     LONG_TYPE = long
 except NameError:
     LONG_TYPE = int
 
+# Secret values are drawn from the OS CSPRNG
+try:
+    from secrets import randbelow, randbits
+except ImportError:
+    randbelow = random.SystemRandom().randrange
+    randbits = random.SystemRandom().getrandbits
+
+# Active tinyec.instrument.Recorder, if any. Hot paths only test it against None, so that operations
+# are not slowed down when nothing is recorded
+_recorder = None
+
+
+def _timed(op):
+    # Records the wall time of the decorated call under op, along with the curve of its first argument
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            if recorder is None:
+                return func(*args, **kwargs)
+            start = timeit.default_timer()
+            result = func(*args, **kwargs)
+            recorder.record(op, timeit.default_timer() - start, args[0] if args else None, result)
+            return result
+        return wrapper
+    return decorator
+
+
 def egcd(a, b):
-    if a == 0:
-        return b, 0, 1
-    else:
-        g, y, x = egcd(b % a, a)
-        return g, x - (b // a) * y, y
+    # Iterative extended Euclidean algorithm: returns (g, x, y) such that a * x + b * y == g == gcd(a, b)
+    x0, y0, x1, y1 = 0, 1, 1, 0
+    while a:
+        q, b, a = b // a, a, b % a
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+    return b, x0, y0
 
 
-def mod_inv(a, p):
-    if a < 0:
-        return p - mod_inv(-a, p)
-    g, x, y = egcd(a, p)
-    if g != 1:
+def mod_inv_egcd(a, p):
+    # Only tracks the coefficient of a, which is all an inverse needs
+    r0, r1 = a % p, p
+    x0, x1 = 1, 0
+    while r1:
+        q = r0 // r1
+        r0, r1 = r1, r0 - q * r1
+        x0, x1 = x1, x0 - q * x1
+    if r0 != 1:
         raise ArithmeticError("Modular inverse does not exist")
-    else:
-        return x % p
+    return x0 % p
+
+
+def mod_inv_binary(a, p):
+    # Binary extended GCD, only using shifts and substractions. Requires an odd modulus
+    if not p & 1:
+        raise ValueError("Binary inversion requires an odd modulus")
+    u, v = a % p, p
+    x1, x2 = 1, 0
+    if not u:
+        raise ArithmeticError("Modular inverse does not exist")
+    while u != 1 and v != 1:
+        while not u & 1:
+            u >>= 1
+            x1 = x1 >> 1 if not x1 & 1 else (x1 + p) >> 1
+        while not v & 1:
+            v >>= 1
+            x2 = x2 >> 1 if not x2 & 1 else (x2 + p) >> 1
+        if u >= v:
+            u -= v
+            x1 -= x2
+        else:
+            v -= u
+            x2 -= x1
+        if not u or not v:
+            raise ArithmeticError("Modular inverse does not exist")
+    return (x1 if u == 1 else x2) % p
+
+
+def mod_inv_fermat(a, p):
+    # a^(p - 2) == a^-1 (mod p), only valid for a prime modulus
+    if not a % p:
+        raise ArithmeticError("Modular inverse does not exist")
+    return pow(a, p - 2, p)
+
+
+def mod_inv_pow(a, p):
+    try:
+        return pow(a, -1, p)
+    except ValueError:
+        raise ArithmeticError("Modular inverse does not exist")
+
+
+MOD_INV_BACKENDS = {"egcd": mod_inv_egcd, "binary": mod_inv_binary, "fermat": mod_inv_fermat}
+
+# Native modular inversion is available starting with python 3.8, and is much faster than any of the
+# pure python implementations. The iterative Euclidean algorithm is the fastest of those
+try:
+    pow(2, -1, 3)
+    MOD_INV_BACKENDS["pow"] = mod_inv_pow
+    mod_inv = mod_inv_pow
+except (TypeError, ValueError):
+    mod_inv = mod_inv_egcd
+
+
+def mod_sqrt(a, p):
+    # A square root of a modulo the odd prime p. The other one is p minus it
+    a %= p
+    if a == 0:
+        return 0
+    if p % 4 == 3:
+        r = pow(a, (p + 1) // 4, p)
+        if r * r % p != a:
+            raise ArithmeticError("Modular square root does not exist")
+        return r
+    # Cipolla: with w = t^2 - a a non residue, (t + sqrt(w))^((p + 1) / 2) is a root of a if there is
+    # any, computed in GF(p^2). Unlike Tonelli-Shanks, its cost does not depend on the power of 2
+    # dividing p - 1 (96 for secp224r1)
+    t = 1
+    while pow(t * t - a, (p - 1) // 2, p) != p - 1:
+        t += 1
+    w = (t * t - a) % p
+    rx, ry = t, 1
+    for bit in bin((p + 1) // 2)[3:]:
+        rx, ry = (rx * rx + ry * ry % p * w) % p, 2 * rx * ry % p
+        if bit == "1":
+            rx, ry = (rx * t + ry * w) % p, (rx + ry * t) % p
+    if rx * rx % p != a:
+        raise ArithmeticError("Modular square root does not exist")
+    return rx
+
+
+# Big endian conversions between ints and fixed size byte strings (or any buffer, such as memoryview
+# slices), through int.from_bytes when available
+if hasattr(int, "from_bytes"):
+    def bytes_to_int(data):
+        return int.from_bytes(data, "big")
+
+    def int_to_bytes(x, size):
+        return x.to_bytes(size, "big")
+else:
+    def bytes_to_int(data):
+        return int(binascii.hexlify(data), 16)
+
+    def int_to_bytes(x, size):
+        return binascii.unhexlify("%0*x" % (size * 2, x))
+
+
+# Internal arithmetic is carried out in Jacobian coordinates: (X, Y, Z) maps to the affine
+# point (X / Z^2, Y / Z^3). This avoids a modular inversion per group operation, a single one
+# being paid when converting the result back to affine coordinates.
+JACOBIAN_INF = (1, 1, 0)
+
+
+def jacobian_double(P, a, p):
+    X1, Y1, Z1 = P
+    if not Z1 or not Y1:
+        return JACOBIAN_INF
+    YY = Y1 * Y1 % p
+    S = 4 * X1 * YY % p
+    ZZ = Z1 * Z1 % p
+    M = (3 * X1 * X1 + a * ZZ * ZZ) % p
+    X3 = (M * M - 2 * S) % p
+    Y3 = (M * (S - X3) - 8 * YY * YY) % p
+    Z3 = 2 * Y1 * Z1 % p
+    return X3, Y3, Z3
+
+
+def jacobian_double_a0(P, a, p):
+    # Doubling for curves with a == 0 (secp256k1): M = 3 * X1^2, Z1 is not needed
+    X1, Y1, Z1 = P
+    if not Z1 or not Y1:
+        return JACOBIAN_INF
+    YY = Y1 * Y1 % p
+    S = 4 * X1 * YY % p
+    M = 3 * X1 * X1 % p
+    X3 = (M * M - 2 * S) % p
+    Y3 = (M * (S - X3) - 8 * YY * YY) % p
+    Z3 = 2 * Y1 * Z1 % p
+    return X3, Y3, Z3
+
+
+def jacobian_double_a3(P, a, p):
+    # Doubling for curves with a == -3 (NIST curves): M = 3 * (X1 - Z1^2) * (X1 + Z1^2)
+    X1, Y1, Z1 = P
+    if not Z1 or not Y1:
+        return JACOBIAN_INF
+    YY = Y1 * Y1 % p
+    S = 4 * X1 * YY % p
+    ZZ = Z1 * Z1 % p
+    M = 3 * (X1 - ZZ) * (X1 + ZZ) % p
+    X3 = (M * M - 2 * S) % p
+    Y3 = (M * (S - X3) - 8 * YY * YY) % p
+    Z3 = 2 * Y1 * Z1 % p
+    return X3, Y3, Z3
+
+
+# Doubling formula per curve shape. Additions do not depend on a, so that all shapes share them
+JACOBIAN_DOUBLINGS = {"generic": jacobian_double, "a=0": jacobian_double_a0, "a=-3": jacobian_double_a3}
+
+
+def curve_shape(a, p):
+    if a % p == 0:
+        return "a=0"
+    elif (a + 3) % p == 0:
+        return "a=-3"
+    return "generic"
+
+
+def jacobian_add(P, Q, a, p):
+    X1, Y1, Z1 = P
+    X2, Y2, Z2 = Q
+    if not Z1:
+        return Q
+    if not Z2:
+        return P
+    Z1Z1 = Z1 * Z1 % p
+    Z2Z2 = Z2 * Z2 % p
+    U1 = X1 * Z2Z2 % p
+    U2 = X2 * Z1Z1 % p
+    S1 = Y1 * Z2 * Z2Z2 % p
+    S2 = Y2 * Z1 * Z1Z1 % p
+    if U1 == U2:
+        if S1 == S2:
+            return jacobian_double(P, a, p)
+        return JACOBIAN_INF
+    H = U2 - U1
+    R = S2 - S1
+    HH = H * H % p
+    HHH = H * HH % p
+    V = U1 * HH % p
+    X3 = (R * R - HHH - 2 * V) % p
+    Y3 = (R * (V - X3) - S1 * HHH) % p
+    Z3 = Z1 * Z2 * H % p
+    return X3, Y3, Z3
+
+
+def jacobian_add_affine(P, x2, y2, a, p):
+    # Mixed addition: the second operand is an affine point (Z2 == 1)
+    X1, Y1, Z1 = P
+    if not Z1:
+        return x2 % p, y2 % p, 1
+    Z1Z1 = Z1 * Z1 % p
+    U2 = x2 * Z1Z1 % p
+    S2 = y2 * Z1 * Z1Z1 % p
+    X1 %= p
+    Y1 %= p
+    if X1 == U2:
+        if Y1 == S2:
+            return jacobian_double(P, a, p)
+        return JACOBIAN_INF
+    H = U2 - X1
+    R = S2 - Y1
+    HH = H * H % p
+    HHH = H * HH % p
+    V = X1 * HH % p
+    X3 = (R * R - HHH - 2 * V) % p
+    Y3 = (R * (V - X3) - Y1 * HHH) % p
+    Z3 = Z1 * H % p
+    return X3, Y3, Z3
+
+
+# Complete addition formulas in homogeneous projective coordinates, where (X, Y, Z) maps to the affine
+# point (X / Z, Y / Z) and (0, 1, 0) is the point at infinity (Renes, Costello and Batina, algorithm 1).
+# The same sequence of operations adds any two points of a curve of odd order, doublings and infinity
+# included. b3 is 3 * b
+PROJECTIVE_INF = (0, 1, 0)
+
+
+def complete_add(P, Q, a, b3, p):
+    X1, Y1, Z1 = P
+    X2, Y2, Z2 = Q
+    t0 = X1 * X2 % p
+    t1 = Y1 * Y2 % p
+    t2 = Z1 * Z2 % p
+    t3 = ((X1 + Y1) * (X2 + Y2) - t0 - t1) % p
+    t4 = ((X1 + Z1) * (X2 + Z2) - t0 - t2) % p
+    t5 = ((Y1 + Z1) * (Y2 + Z2) - t1 - t2) % p
+    Z3 = (a * t4 + b3 * t2) % p
+    X3 = t1 - Z3
+    Z3 = t1 + Z3
+    Y3 = X3 * Z3 % p
+    t1 = 3 * t0 + a * t2
+    t2 = a * (t0 - a * t2) % p
+    t4 = (b3 * t4 + t2) % p
+    Y3 = (Y3 + t1 * t4) % p
+    X3 = (t3 * X3 - t5 * t4) % p
+    Z3 = (t5 * Z3 + t3 * t1) % p
+    return X3, Y3, Z3
+
+
+def batch_mod_inv(values, p):
+    # Montgomery's trick: inverts all values with a single modular inversion and 3 multiplications
+    # per value
+    prefixes = []
+    acc = 1
+    for value in values:
+        acc = acc * value % p
+        prefixes.append(acc)
+    if not prefixes:
+        return []
+    inv = mod_inv(acc, p)
+    if _recorder is not None:
+        _recorder.count_inversion(p, 3 * len(prefixes))
+    inverses = [0] * len(prefixes)
+    for i in range(len(prefixes) - 1, 0, -1):
+        inverses[i] = inv * prefixes[i - 1] % p
+        inv = inv * values[i] % p
+    inverses[0] = inv
+    return inverses
+
+
+def jacobian_to_affine_batch(points, p):
+    # Same as jacobian_to_affine on each point, with a single modular inversion
+    finite = [P for P in points if P[2]]
+    inverses = iter(batch_mod_inv([P[2] for P in finite], p))
+    affine = []
+    for X, Y, Z in points:
+        if not Z:
+            affine.append(None)
+            continue
+        z_inv = next(inverses)
+        zz_inv = z_inv * z_inv % p
+        affine.append((X * zz_inv % p, Y * zz_inv * z_inv % p))
+    return affine
+
+
+def normalize_batch(curve, points):
+    # Converts an iterable of Jacobian points to Point (or Inf) instances, with a single inversion
+    return [Point(curve, affine[0], affine[1]) if affine is not None else Inf(curve)
+            for affine in jacobian_to_affine_batch(list(points), curve.field.p)]
+
+
+def jacobian_to_affine(P, p):
+    X, Y, Z = P
+    if not Z:
+        return None
+    z_inv = mod_inv(Z, p)
+    if _recorder is not None:
+        _recorder.count_inversion(p)
+    zz_inv = z_inv * z_inv % p
+    return X * zz_inv % p, Y * zz_inv * z_inv % p
+
+
+def _from_jacobian(curve, P, trusted=False):
+    affine = jacobian_to_affine(P, curve.field.p)
+    if affine is None:
+        return Inf(curve)
+    if trusted:
+        return _derived_point(curve, affine[0], affine[1])
+    return Point(curve, affine[0], affine[1])
+
+
+def _derived_point(curve, x, y):
+    # Builds the result of an operation on points known to be on the curve, which is on the curve as
+    # well: the check done by Point.__init__ is skipped
+    point = Point.__new__(Point)
+    point.curve = curve
+    point.x = x
+    point.y = y
+    point._on_curve = True
+    return point
+
+
+def _odd_multiples(curve, points, window):
+    # For each affine point P, the affine odd multiples P, 3P, ..., (2^(window - 1) - 1)P and their
+    # opposites. All multiples are normalized together, at the cost of a single inversion
+    a, p = curve.a, curve.field.p
+    double, add, add_affine = curve.group_law
+    multiples = []
+    for x, y in points:
+        P = (x, y, 1)
+        P2 = double(P, a, p)
+        odd = [P]
+        for _ in range(1, 1 << (window - 2)):
+            odd.append(add(odd[-1], P2, a, p))
+        multiples.extend(odd)
+    affine = jacobian_to_affine_batch(multiples, p)
+    size = 1 << (window - 2)
+    tables = []
+    for i in range(0, len(affine), size):
+        odd = affine[i:i + size]
+        tables.append((odd, [(entry[0], -entry[1] % p) if entry is not None else None for entry in odd]))
+    return tables
+
+
+def wnaf(k, window):
+    # Width-w non adjacent form of k, LSB first: non-zero digits are odd, lie in ]-2^(w-1), 2^(w-1)[ and
+    # are separated by at least w - 1 zeros
+    digits = []
+    width = 1 << window
+    while k:
+        if k & 1:
+            digit = k & (width - 1)
+            if digit >= width >> 1:
+                digit -= width
+            k -= digit
+        else:
+            digit = 0
+        digits.append(digit)
+        k >>= 1
+    return digits
+
+
+MUL_METHODS = ("wnaf", "binary", "ladder")
+
+# Random bits of the multiple of n added to scalars by the ladder method
+LADDER_BLINDING_BITS = 64
+
+
+class Endomorphism(object):
+    # Efficiently computable endomorphism (x, y) => (beta * x, y) of a curve, acting on points of the
+    # subgroup as the multiplication by lam. basis holds two short vectors (a, b) such that
+    # a + b * lam == 0 (mod n), from which scalars are split into two halves (GLV method)
+    __slots__ = ("beta", "lam", "basis")
+
+    def __init__(self, beta, lam, basis):
+        self.beta = beta
+        self.lam = lam
+        self.basis = basis
+
+    def split(self, k, n):
+        # (k1, k2) such that k == k1 + k2 * lam (mod n), both of about half the size of n. Either can
+        # be negative
+        (a1, b1), (a2, b2) = self.basis
+        c1 = (b2 * k + n // 2) // n
+        c2 = (-b1 * k + n // 2) // n
+        return k - c1 * a1 - c2 * a2, -c1 * b1 - c2 * b2
+
+    def expand(self, curve, scalars, points):
+        # Splits each term k * (x, y) into k1 * (x, y) + k2 * (beta * x, y), dropping null terms
+        n, p = curve.field.n, curve.field.p
+        split_scalars = []
+        split_points = []
+        for k, (x, y) in zip(scalars, points):
+            k1, k2 = self.split(k, n)
+            for k, x in ((k1, x), (k2, self.beta * x % p)):
+                if k > 0:
+                    split_scalars.append(k)
+                    split_points.append((x, y))
+                elif k < 0:
+                    split_scalars.append(-k)
+                    split_points.append((x, -y % p))
+        return split_scalars, split_points
+
+    def expand_tables(self, curve, scalars, tables):
+        # Same as expand, on the (odd, neg) tables of _odd_multiples. The tables of the images are
+        # derived from the ones of the points, as the endomorphism only changes x
+        n, p = curve.field.n, curve.field.p
+        split_scalars = []
+        split_tables = []
+        for k, table in zip(scalars, tables):
+            k1, k2 = self.split(k, n)
+            for k, table in ((k1, table), (k2, self.image_table(table, p))):
+                if k > 0:
+                    split_scalars.append(k)
+                    split_tables.append(table)
+                elif k < 0:
+                    split_scalars.append(-k)
+                    split_tables.append((table[1], table[0]))
+        return split_scalars, split_tables
+
+    def image_table(self, table, p):
+        # (odd, neg) table of the image of a point, from the table of the point
+        beta = self.beta
+        image = [(beta * entry[0] % p, entry[1]) if entry is not None else None for entry in table[0]]
+        return image, [(entry[0], -entry[1] % p) if entry is not None else None for entry in image]
 
 
 class Curve(object):
-    def __init__(self, a, b, field, name="undefined"):
+    __slots__ = ("name", "a", "b", "field", "g", "endomorphism", "shape", "mul_method", "wnaf_window", "backend",
+                 "_group_law", "_g_table", "_g_multiples", "_shared")
+
+    # Defaults for the scalar multiplication method of variable base points, which can be overridden
+    # per curve through the mul_method and wnaf_window attributes. Curves with an endomorphism default
+    # to the "glv" method
+    MUL_METHOD = "wnaf"
+    WNAF_WINDOW = 4
+
+    # Domain parameters can not be changed once set, as curves are shared
+    PARAMETERS = ("name", "a", "b", "field", "g", "endomorphism")
+    # Settings that can only be changed on curves which are not shared, such as the ones of
+    # tinyec.registry.make_curve: on the instances of get_curve, they would change for all callers
+    TUNABLES = ("mul_method", "wnaf_window", "backend", "_group_law")
+
+    def __init__(self, a, b, field, name="undefined", endomorphism=None):
+        # endomorphism is an optional Endomorphism of the curve, only used for curves of cofactor 1
+        self._shared = False
         self.name = name
         self.a = a
         self.b = b
         self.field = field
+        self.endomorphism = endomorphism if field.h == 1 else None
+        self.shape = curve_shape(a, field.p)
+        self.mul_method = self.MUL_METHOD if self.endomorphism is None else "glv"
+        self.wnaf_window = self.WNAF_WINDOW
+        self._g_table = None
+        self._g_multiples = {}
+        self.use_backend(fields.select_backend(field.p))
         self.g = Point(self, self.field.g[0], self.field.g[1])
 
+    def __setattr__(self, name, value):
+        if name in self.PARAMETERS and hasattr(self, name):
+            raise AttributeError("Curve parameter %s is read-only" % name)
+        if name in self.TUNABLES:
+            self._check_private(name)
+        if name == "mul_method" and value == "ladder" and self.field.h != 1:
+            raise ValueError("The ladder method requires a curve of cofactor 1, not %d" % self.field.h)
+        super(Curve, self).__setattr__(name, value)
+
+    def _check_private(self, setting):
+        if self._shared:
+            raise AttributeError("Curve %s is shared, and its %s is read-only: use tinyec.registry.make_curve for "
+                                 "an instance of its own" % (self.name, setting))
+
+    def use_backend(self, backend):
+        # backend is a tinyec.field backend instance, or the name of one. Its group law replaces the
+        # generic one of the "generic" backend, both being specialized for the shape of the curve.
+        # Backends without a group law only provide field element arithmetic, and are rejected
+        self._check_private("backend")
+        if not isinstance(backend, fields.PrimeField):
+            if backend not in fields.BACKENDS:
+                raise ValueError("Unknown field backend %s" % backend)
+            backend = fields.BACKENDS[backend](self.field.p)
+        elif backend.p != self.field.p:
+            raise ValueError("Field backend %s is not built for the prime of curve %s" % (backend.name, self.name))
+        law = backend.group_law(self.shape)
+        if law is None:
+            if type(backend) is not fields.PrimeField:
+                raise ValueError("Field backend %s has no group law" % backend.name)
+            law = (JACOBIAN_DOUBLINGS[self.shape], jacobian_add, jacobian_add_affine)
+        self.backend = backend
+        self.group_law = law
+
+    # Left out of pickles: the group law of some backends is made of closures, which can not be pickled,
+    # and generator precomputations would make every pickled point as large as them. All are rebuilt on
+    # load, the precomputations lazily
+    # Loaded curves are never shared
+    UNPICKLED = ("_group_law", "_g_table", "_g_multiples", "_shared")
+
+    def __getstate__(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__
+                    if name not in self.UNPICKLED and hasattr(self, name))
+
+    def __setstate__(self, state):
+        self._shared = False
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._g_table = None
+        self._g_multiples = {}
+        self.use_backend(self.backend)
+
+    @property
+    def group_law(self):
+        # (double, add, add_affine) Jacobian formulas of the curve, wrapped to count operations while a
+        # tinyec.instrument.Recorder is active
+        if _recorder is None:
+            return self._group_law
+        return _recorder.group_law(self)
+
+    @group_law.setter
+    def group_law(self, law):
+        self._group_law = law
+
+    @property
+    def g_table(self):
+        # Built on first use, as most curves are never used for key generation
+        if self._g_table is None:
+            self._g_table = FixedBaseTable(self)
+        return self._g_table
+
+    def precompute_g(self, window=None):
+        # Replaces the generator table by one with a different window. Wider windows make generator
+        # multiplications faster, at the cost of a table twice as large per extra bit of window. Shared
+        # curves keep the default window
+        if window not in (None, FixedBaseTable.WINDOW):
+            self._check_private("generator table")
+        if self._g_table is None or (window is not None and self._g_table.window != window):
+            self._g_table = FixedBaseTable(self, window)
+        return self._g_table
+
+    def g_multiples(self, window):
+        # (odd, neg) table of g, as built by _odd_multiples, for joint multiplications involving g such as
+        # ECDSA verifications. Built once per window
+        table = self._g_multiples.get(window)
+        if table is None:
+            table = self._g_multiples[window] = _odd_multiples(self, [(self.g.x, self.g.y)], window)[0]
+        return table
+
+    def load_g_table(self, data):
+        self._check_private("generator table")
+        self._g_table = FixedBaseTable.load(self, data)
+        return self._g_table
+
     def is_singular(self):
         return (4 * self.a**3 + 27 * self.b**2) % self.field.p == 0
 
@@ -54,12 +626,19 @@ class Curve(object):
 
 
 class SubGroup(object):
+    __slots__ = ("p", "g", "n", "h")
+
     def __init__(self, p, g, n, h):
         self.p = p
         self.g = g
         self.n = n
         self.h = h
 
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError("Subgroup parameter %s is read-only" % name)
+        super(SubGroup, self).__setattr__(name, value)
+
     def __eq__(self, other):
         if not isinstance(other, SubGroup):
             return False
@@ -77,6 +656,8 @@ class SubGroup(object):
 
 
 class Inf(object):
+    __slots__ = ("curve", "x", "y")
+
     def __init__(self, curve, x=None, y=None):
         self.x = x
         self.y = y
@@ -106,6 +687,10 @@ class Inf(object):
         raise TypeError("Unsupported operand type(s) for +: '%s' and '%s'" % (other.__class__.__name__,
                                                                                   self.__class__.__name__))
 
+    def encode(self, compressed=True):
+        # SEC1 encoding of the point at infinity
+        return b"\x00"
+
     def __str__(self):
         return "%s on %s" % (self.__class__.__name__, self.curve)
 
@@ -114,21 +699,39 @@ class Inf(object):
 
 
 class Point(object):
-    def __init__(self, curve, x, y):
+    __slots__ = ("curve", "x", "y", "_on_curve")
+
+    def __init__(self, curve, x, y, check=True):
+        # With check=False, the on curve check is deferred until on_curve is first read
         self.curve = curve
         self.x = x
         self.y = y
-        self.p = self.curve.field.p
-        self.on_curve = True
-        if not self.curve.on_curve(self.x, self.y):
+        self._on_curve = None
+        if check:
+            self.validate()
+
+    def validate(self):
+        self._on_curve = self.curve.on_curve(self.x, self.y)
+        if not self._on_curve:
             warnings.warn("Point (%d, %d) is not on curve \"%s\"" % (self.x, self.y, self.curve))
-            self.on_curve = False
+        return self._on_curve
 
-    def __m(self, p, q):
-        if p.x == q.x:
-            return (3 * p.x**2 + self.curve.a) * mod_inv(2 * p.y, self.p)
-        else:
-            return (p.y - q.y) * mod_inv(p.x - q.x, self.p)
+    @property
+    def on_curve(self):
+        if self._on_curve is None:
+            return self.validate()
+        return self._on_curve
+
+    @on_curve.setter
+    def on_curve(self, value):
+        self._on_curve = value
+
+    @property
+    def p(self):
+        return self.curve.field.p
+
+    def _from_jacobian(self, P, trusted=False):
+        return _from_jacobian(self.curve, P, trusted)
 
     def __eq__(self, other):
         if not isinstance(other, Point):
@@ -138,6 +741,7 @@ class Point(object):
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    @_timed("add")
     def __add__(self, other):
         if isinstance(other, Inf):
             return self
@@ -145,21 +749,32 @@ class Point(object):
             if self.x == other.x and self.y != other.y:
                 return Inf(self.curve)
             elif self.curve == other.curve:
-                m = self.__m(self, other)
-                x_r = (m**2 - self.x - other.x) % self.p
-                y_r = -(self.y + m * (x_r - self.x)) % self.p
-                return Point(self.curve, x_r, y_r)
+                p = self.p
+                add_affine = self.curve.group_law[2]
+                return self._from_jacobian(add_affine((self.x % p, self.y % p, 1), other.x % p, other.y % p,
+                                                      self.curve.a, p),
+                                           self.on_curve and other.on_curve)
             else:
                 raise ValueError("Cannot add points belonging to different curves")
         else:
             raise TypeError("Unsupported operand type(s) for +: '%s' and '%s'" % (other.__class__.__name__,
                                                                                   self.__class__.__name__))
 
+    @_timed("sub")
     def __sub__(self, other):
         if isinstance(other, Inf):
             return self.__add__(other)
         if isinstance(other, Point):
-            return self.__add__(Point(self.curve, other.x, -other.y % self.p))
+            if self.x == other.x and self.y == other.y:
+                return Inf(self.curve)
+            elif self.curve == other.curve:
+                p = self.p
+                add_affine = self.curve.group_law[2]
+                return self._from_jacobian(add_affine((self.x % p, self.y % p, 1), other.x % p, -other.y % p,
+                                                      self.curve.a, p),
+                                           self.on_curve and other.on_curve)
+            else:
+                raise ValueError("Cannot substract points belonging to different curves")
         else:
             raise TypeError("Unsupported operand type(s) for -: '%s' and '%s'" % (other.__class__.__name__,
                                                                                   self.__class__.__name__))
@@ -167,27 +782,169 @@ class Point(object):
     def __mul__(self, other):
         if isinstance(other, Inf):
             return Inf(self.curve)
-        if isinstance(other, int) or isinstance(other, LONG_TYPE):
-            if other % self.curve.field.n == 0:
+        return self.mul(other)
+
+    @_timed("mul")
+    def mul(self, k, method=None, window=None):
+        # method is one of MUL_METHODS, and defaults to the curve's mul_method. The generator of the
+        # curve uses its precomputed table unless a method is explicitly requested, or the curve uses the
+        # ladder method
+        if isinstance(k, int) or isinstance(k, LONG_TYPE):
+            if method == "ladder" or method is None and self.curve.mul_method == "ladder":
+                return self._mul_hardened(k)
+            if k % self.curve.field.n == 0:
                 return Inf(self.curve)
-            if other < 0:
-                addend = Point(self.curve, self.x, -self.y % self.p)
-            else:
-                addend = self
-            result = Inf(self.curve)
-            # Iterate over all bits starting by the LSB
-            for bit in reversed([int(i) for i in bin(abs(other))[2:]]):
-                if bit == 1:
-                    result += addend
-                addend += addend
-            return result
+            X, Y, Z = self._mul_jacobian(abs(k), method, window)
+            if k < 0:
+                Y = -Y % self.p
+            return self._from_jacobian((X, Y, Z), self.on_curve)
         else:
-            raise TypeError("Unsupported operand type(s) for *: '%s' and '%s'" % (other.__class__.__name__,
+            raise TypeError("Unsupported operand type(s) for *: '%s' and '%s'" % (k.__class__.__name__,
                                                                                   self.__class__.__name__))
 
+    def _mul_jacobian(self, k, method=None, window=None):
+        if method is None:
+            g = self.curve.g
+            if self.x == g.x and self.y == g.y and self.curve.mul_method != "ladder":
+                table = self.curve.g_table
+                if k.bit_length() <= table.bits:
+                    return table.mul(k)
+            method = self.curve.mul_method
+        window = window or self.curve.wnaf_window
+        if method in ("wnaf", "glv") and window < 2:
+            raise ValueError("wNAF window must be at least 2, got %d" % window)
+        x, y = self.x % self.p, self.y % self.p
+        if method == "ladder":
+            X, Y, Z = self._mul_ladder(x, y, k)
+            return X * Z % self.p, Y * Z * Z % self.p, Z
+        if method == "glv":
+            if self.curve.endomorphism is None:
+                raise ValueError("Curve %s has no endomorphism" % self.curve.name)
+            # The endomorphism only acts as a scalar multiplication on points of the subgroup
+            if self.on_curve:
+                return self._mul_glv(x, y, k, window)
+            method = "wnaf"
+        if method == "wnaf":
+            return self._mul_wnaf(x, y, k, window)
+        elif method == "binary":
+            return self._mul_binary(x, y, k)
+        else:
+            raise ValueError("Unknown scalar multiplication method %s" % method)
+
+    def _mul_hardened(self, k):
+        # Ladder multiplication, for secret scalars. Points off the curve are rejected, as they could
+        # leak the scalar (invalid curve attacks), and the result is normalized with a fixed exponent
+        # inversion
+        if not self.on_curve:
+            raise ValueError("Point (%d, %d) is not on curve \"%s\"" % (self.x, self.y, self.curve))
+        p = self.p
+        X, Y, Z = self._mul_ladder(self.x % p, self.y % p, k)
+        z_inv = pow(Z, p - 2, p)
+        if _recorder is not None:
+            _recorder.count_inversion(p)
+        if not z_inv:
+            return Inf(self.curve)
+        return _derived_point(self.curve, X * z_inv % p, Y * z_inv % p)
+
+    def _mul_ladder(self, x, y, k):
+        # Montgomery ladder over complete formulas, as projective coordinates. The scalar is reduced
+        # modulo n and blinded with a random multiple of n, and the ladder always runs over the same
+        # number of bits, each taking one addition, one doubling and arithmetic conditional swaps. This
+        # removes branches and operation sequences depending on the scalar, but python ints do not
+        # guarantee constant time arithmetic. Both the blinding and the complete formulas (which need a
+        # group of odd order) only hold on curves of cofactor 1
+        if self.curve.field.h != 1:
+            raise ValueError("The ladder method requires a curve of cofactor 1, not %d" % self.curve.field.h)
+        a, p, n = self.curve.a % self.p, self.p, self.curve.field.n
+        b3 = 3 * self.curve.b % p
+        k = k % n + randbits(LADDER_BLINDING_BITS) * n
+        add = complete_add if _recorder is None else _recorder.complete_add(self.curve)
+        R0, R1 = PROJECTIVE_INF, (x, y, 1)
+        swap = 0
+        for i in range(n.bit_length() + LADDER_BLINDING_BITS - 1, -1, -1):
+            bit = (k >> i) & 1
+            # Swaps R0 and R1 when the bit differs from the previous one
+            mask = -(swap ^ bit)
+            X = mask & (R0[0] ^ R1[0])
+            Y = mask & (R0[1] ^ R1[1])
+            Z = mask & (R0[2] ^ R1[2])
+            R0, R1 = (R0[0] ^ X, R0[1] ^ Y, R0[2] ^ Z), (R1[0] ^ X, R1[1] ^ Y, R1[2] ^ Z)
+            swap = bit
+            R1 = add(R0, R1, a, b3, p)
+            R0 = add(R0, R0, a, b3, p)
+        mask = -swap
+        return tuple(r0 ^ (mask & (r0 ^ r1)) for r0, r1 in zip(R0, R1))
+
+    def _mul_binary(self, x, y, k):
+        a, p = self.curve.a, self.p
+        double, add, add_affine = self.curve.group_law
+        R = (x, y, 1)
+        # Left to right double and add, starting after the MSB
+        for bit in bin(k)[3:]:
+            R = double(R, a, p)
+            if bit == "1":
+                R = add_affine(R, x, y, a, p)
+        return R
+
+    def _mul_wnaf(self, x, y, k, window):
+        a, p = self.curve.a, self.p
+        double, add, add_affine = self.curve.group_law
+        odd, neg = _odd_multiples(self.curve, [(x, y)], window)[0]
+        R = JACOBIAN_INF
+        for digit in reversed(wnaf(k, window)):
+            R = double(R, a, p)
+            if digit:
+                entry = odd[digit >> 1] if digit > 0 else neg[-digit >> 1]
+                if entry is not None:
+                    R = add_affine(R, entry[0], entry[1], a, p)
+        return R
+
+    def _mul_glv(self, x, y, k, window):
+        # k * P as k1 * P + k2 * endomorphism(P), with half size scalars sharing their doublings
+        return _straus(self.curve, [k], [(x, y)], window, glv=True)
+
     def __rmul__(self, other):
         return self.__mul__(other)
 
+    def encode(self, compressed=True):
+        # SEC1 encoding: 0x02 or 0x03 (parity of y) followed by x when compressed, 0x04 followed by x and y
+        # otherwise. Coordinates take the byte size of p
+        size = (self.p.bit_length() + 7) // 8
+        x, y = self.x % self.p, self.y % self.p
+        if compressed:
+            return int_to_bytes(2 + (y & 1), 1) + int_to_bytes(x, size)
+        return b"\x04" + int_to_bytes(x, size) + int_to_bytes(y, size)
+
+    @staticmethod
+    def decode(curve, data, check=True):
+        # Point (or Inf) from its SEC1 encoding. Decompressed points are on the curve by construction,
+        # while uncompressed ones are checked unless check is False
+        p = curve.field.p
+        size = (p.bit_length() + 7) // 8
+        prefix = bytes_to_int(data[:1])
+        if prefix == 0 and len(data) == 1:
+            return Inf(curve)
+        if prefix in (2, 3) and len(data) == size + 1:
+            x = bytes_to_int(data[1:])
+            if x >= p:
+                raise ValueError("Invalid point encoding")
+            try:
+                y = mod_sqrt(x * x * x + curve.a * x + curve.b, p)
+            except ArithmeticError:
+                raise ValueError("Invalid point encoding")
+            if y & 1 != prefix & 1:
+                y = (p - y) % p
+                if y & 1 != prefix & 1:
+                    # y == 0 only has an even encoding (SEC1, section 2.3.4)
+                    raise ValueError("Invalid point encoding")
+            return _derived_point(curve, x, y)
+        if prefix == 4 and len(data) == 2 * size + 1:
+            x, y = bytes_to_int(data[1:size + 1]), bytes_to_int(data[size + 1:])
+            if x >= p or y >= p:
+                raise ValueError("Invalid point encoding")
+            return Point(curve, x, y, check)
+        raise ValueError("Invalid point encoding")
+
     def __str__(self):
         return "(%d, %d) %s %s" % (self.x, self.y, "on" if self.on_curve else "off", self.curve)
 
@@ -195,12 +952,241 @@ class Point(object):
         return self.__str__()
 
 
-def make_keypair(curve):
-    priv = random.randint(1, curve.field.n)
-    pub = priv * curve.g
+# Precomputed multiples of a curve generator G. Row i holds the affine points j * 2^(i * window) * G
+# for 1 <= j < 2^window, so that k * G is obtained by adding one table entry per window of k, without
+# any doubling.
+class FixedBaseTable(object):
+    WINDOW = 4
+
+    def __init__(self, curve, window=None, rows=None):
+        self.curve = curve
+        self.window = window or self.WINDOW
+        self.bits = -(-curve.field.n.bit_length() // self.window) * self.window
+        if rows is None:
+            rows = self._build()
+        self.rows = rows
+
+    def _build(self):
+        a, p = self.curve.a, self.curve.field.p
+        add = self.curve.group_law[1]
+        multiples = []
+        base = (self.curve.g.x % p, self.curve.g.y % p, 1)
+        for _ in range(self.bits // self.window):
+            multiple = base
+            for j in range(1, 1 << self.window):
+                if j > 1:
+                    multiple = add(multiple, base, a, p)
+                multiples.append(multiple)
+            # The next base is 2^window * base, i.e. the last multiple plus the base
+            base = add(multiple, base, a, p)
+        affine = jacobian_to_affine_batch(multiples, p)
+        per_row = (1 << self.window) - 1
+        return [affine[i:i + per_row] for i in range(0, len(affine), per_row)]
+
+    def mul(self, k):
+        a, p = self.curve.a, self.curve.field.p
+        add_affine = self.curve.group_law[2]
+        mask = (1 << self.window) - 1
+        R = JACOBIAN_INF
+        for row in self.rows:
+            digit = k & mask
+            if digit:
+                entry = row[digit - 1]
+                if entry is not None:
+                    R = add_affine(R, entry[0], entry[1], a, p)
+            k >>= self.window
+        return R
+
+    def dump(self):
+        # Plain ints and lists only, so the result can be pickled, or stored as json
+        return {"window": self.window,
+                "points": [list(entry) if entry is not None else None for row in self.rows for entry in row]}
+
+    @classmethod
+    def load(cls, curve, data):
+        window = data["window"]
+        points = [tuple(entry) if entry is not None else None for entry in data["points"]]
+        per_row = (1 << window) - 1
+        table = cls(curve, window, rows=[])
+        if len(points) != table.bits // window * per_row:
+            raise ValueError("Precomputed table does not match curve %s" % curve.name)
+        table.rows = [points[i:i + per_row] for i in range(0, len(points), per_row)]
+        table._check()
+        return table
+
+    def _check(self):
+        # Each entry must be the previous one plus the base of its row (the first entry of the row, or
+        # G for the first row), the first entry of a row following the last one of the previous row.
+        # The sums are compared in Jacobian coordinates, without any inversion
+        a, p = self.curve.a, self.curve.field.p
+        add_affine = self.curve.group_law[2]
+        base = (self.curve.g.x % p, self.curve.g.y % p)
+        previous = JACOBIAN_INF
+        for row in self.rows:
+            for j, entry in enumerate(row):
+                X, Y, Z = add_affine(previous, base[0], base[1], a, p)
+                if entry is None:
+                    valid = not Z
+                else:
+                    x, y = entry
+                    ZZ = Z * Z % p
+                    valid = Z % p and 0 <= x < p and 0 <= y < p and not (X - x * ZZ) % p and \
+                        not (Y - y * ZZ * Z) % p
+                if not valid:
+                    raise ValueError("Precomputed table does not match curve %s" % self.curve.name)
+                previous = (entry[0], entry[1], 1) if entry is not None else JACOBIAN_INF
+                if not j:
+                    base = entry
+
+
+# Above this number of terms, multi_mul switches from Straus to Pippenger
+MULTI_MUL_STRAUS_MAX = 64
+
+
+@_timed("multi_mul")
+def multi_mul(terms, method=None):
+    # Computes k1 * P1 + k2 * P2 + ... for an iterable of (k, P) terms. method is "straus" (interleaved
+    # wNAF, sharing doublings between all terms) or "pippenger" (bucket method, whose cost grows
+    # sublinearly with the number of terms). By default, it is chosen from the number of terms
+    curve = None
+    trusted = True
+    scalars = []
+    points = []
+    for k, P in terms:
+        if not (isinstance(k, int) or isinstance(k, LONG_TYPE)):
+            raise TypeError("Unsupported operand type(s) for *: '%s' and '%s'" % (k.__class__.__name__,
+                                                                                  P.__class__.__name__))
+        if curve is None:
+            curve = P.curve
+        elif P.curve != curve:
+            raise ValueError("Cannot add points belonging to different curves")
+        if isinstance(P, Inf) or k % curve.field.n == 0:
+            continue
+        trusted = trusted and P.on_curve
+        if k < 0:
+            scalars.append(-k)
+            points.append((P.x % curve.field.p, -P.y % curve.field.p))
+        else:
+            scalars.append(k)
+            points.append((P.x % curve.field.p, P.y % curve.field.p))
+    if curve is None:
+        raise ValueError("At least one term must be provided")
+    # The endomorphism only acts as a scalar multiplication on points of the subgroup
+    glv = curve.endomorphism is not None and trusted
+    return _from_jacobian(curve, _multi_mul_jacobian(curve, scalars, points, method, glv), trusted)
+
+
+def _multi_mul_jacobian(curve, scalars, points, method=None, glv=False):
+    # With glv, scalars are split through the endomorphism of the curve
+    if not scalars:
+        return JACOBIAN_INF
+    if method is None:
+        method = "straus" if len(scalars) <= MULTI_MUL_STRAUS_MAX else "pippenger"
+    if method == "straus":
+        return _straus(curve, scalars, points, glv=glv)
+    elif method == "pippenger":
+        if glv:
+            scalars, points = curve.endomorphism.expand(curve, scalars, points)
+        return _pippenger(curve, scalars, points)
+    else:
+        raise ValueError("Unknown multi scalar multiplication method %s" % method)
+
+
+def _straus(curve, scalars, points, window=4, glv=False):
+    tables = _odd_multiples(curve, points, window)
+    if glv:
+        scalars, tables = curve.endomorphism.expand_tables(curve, scalars, tables)
+        if not scalars:
+            return JACOBIAN_INF
+    return _interleave(curve, [wnaf(k, window) for k in scalars], tables)
+
+
+def _interleave(curve, nafs, tables):
+    # Sum of the wNAF digits of nafs applied to the (odd, neg) tables of their points. The table entries
+    # to add are gathered per bit position first, so that the main loop only goes through non zero digits
+    a, p = curve.a, curve.field.p
+    double, add, add_affine = curve.group_law
+    adds = [[] for _ in range(max(len(naf) for naf in nafs))]
+    for naf, (odd, neg) in zip(nafs, tables):
+        for i, digit in enumerate(naf):
+            if digit:
+                entry = odd[digit >> 1] if digit > 0 else neg[-digit >> 1]
+                if entry is not None:
+                    adds[i].append(entry)
+    R = JACOBIAN_INF
+    for entries in reversed(adds):
+        R = double(R, a, p)
+        for x, y in entries:
+            R = add_affine(R, x, y, a, p)
+    return R
+
+
+def mul_shared(curve, k, points, glv=False):
+    # k * P for each affine P of points, as Jacobian points, for 0 < k. The scalar is recoded once for
+    # all points, and the odd multiples of all points are normalized together. With glv, the scalar is
+    # split through the endomorphism of the curve, which requires points of the subgroup
+    p = curve.field.p
+    window = curve.wnaf_window
+    tables = _odd_multiples(curve, points, window)
+    if glv:
+        parts = [(abs(half), half < 0, image) for half, image in zip(curve.endomorphism.split(k, curve.field.n),
+                                                                     (False, True)) if half]
+    else:
+        parts = [(k, False, False)]
+    nafs = [wnaf(half, window) for half, _, _ in parts]
+    results = []
+    for table in tables:
+        if glv:
+            image_table = curve.endomorphism.image_table(table, p)
+        part_tables = []
+        for _, negative, image in parts:
+            odd, neg = image_table if image else table
+            part_tables.append((neg, odd) if negative else (odd, neg))
+        results.append(_interleave(curve, nafs, part_tables))
+    return results
+
+
+def _pippenger(curve, scalars, points):
+    a, p = curve.a, curve.field.p
+    double, add, add_affine = curve.group_law
+    # Window size growing with log2 of the number of terms
+    c = max(2, len(scalars).bit_length() - 3)
+    mask = (1 << c) - 1
+    bits = max(k.bit_length() for k in scalars)
+    R = JACOBIAN_INF
+    for shift in range((bits - 1) // c * c, -1, -c):
+        for _ in range(c):
+            R = double(R, a, p)
+        buckets = [JACOBIAN_INF] * mask
+        for k, (x, y) in zip(scalars, points):
+            digit = (k >> shift) & mask
+            if digit:
+                buckets[digit - 1] = add_affine(buckets[digit - 1], x, y, a, p)
+        # sum(d * bucket[d]) is computed with running sums, from the highest bucket down
+        running = JACOBIAN_INF
+        total = JACOBIAN_INF
+        for bucket in reversed(buckets):
+            running = add(running, bucket, a, p)
+            total = add(total, running, a, p)
+        R = add(R, total, a, p)
+    return R
+
+
+@_timed("make_keypair")
+def make_keypair(curve, hardened=False):
+    # The private key is drawn from the OS CSPRNG. With hardened, the public key is computed with the
+    # ladder method, whatever the curve's mul_method
+    priv = randbelow(curve.field.n - 1) + 1
+    pub = curve.g.mul(priv, "ladder") if hardened else priv * curve.g
     return Keypair(curve, priv, pub)
 
 
+def amake_keypair(curve, hardened=False, coalescer=None):
+    # Coroutine version of make_keypair, run out of the event loop by a tinyec.aio.Coalescer
+    import tinyec.aio as aio
+    return aio.make_keypair(curve, hardened, coalescer)
+
+
 class Keypair(object):
     def __init__(self, curve, priv=None, pub=None):
         if priv is None and pub is None:
@@ -215,17 +1201,381 @@ class Keypair(object):
         if pub is None:
             self.pub = self.priv * self.curve.g
 
+    def encode(self, compressed=True):
+        # SEC1 encoding of the public key
+        return self.pub.encode(compressed)
+
+    def encode_priv(self):
+        # SEC1 encoding of the private key: big endian, on the byte size of n
+        if not self.can_sign:
+            raise ValueError("Missing private key")
+        return int_to_bytes(self.priv, (self.curve.field.n.bit_length() + 7) // 8)
+
+    @classmethod
+    def decode(cls, curve, priv=None, pub=None):
+        # Keypair from the SEC1 encodings of its public and/or private key
+        if pub is not None:
+            pub = Point.decode(curve, pub)
+        if priv is not None:
+            priv = bytes_to_int(priv)
+            if not 0 < priv < curve.field.n:
+                raise ValueError("Invalid private key encoding")
+        return cls(curve, priv, pub)
+
+
+def encode_points(points, compressed=True):
+    # Concatenated SEC1 encodings of points, all of the same size for points of a curve
+    return b"".join(point.encode(compressed) for point in points)
+
+
+def decode_points(curve, data, compressed=True, check=True):
+    # Yields the points of data, a buffer of packed SEC1 encodings of the same kind. Encodings are read
+    # through a memoryview, without copying data
+    size = (curve.field.p.bit_length() + 7) // 8
+    width = size + 1 if compressed else 2 * size + 1
+    view = memoryview(data)
+    if len(view) % width:
+        raise ValueError("Buffer size is not a multiple of the encoding size")
+    for i in range(0, len(view), width):
+        yield Point.decode(curve, view[i:i + width], check)
+
+
+class PointArray(object):
+    # Points of a curve stored as packed big endian x || y coordinates, each on the byte size of p, in
+    # a contiguous buffer: a bytearray, or any other buffer such as a memory mapped file. Point instances
+    # are only built when indexing or iterating, with a deferred on curve check. Slices are copies, so
+    # that they do not prevent the array from being extended or closed
+    def __init__(self, curve, data=None):
+        self.curve = curve
+        self.size = (curve.field.p.bit_length() + 7) // 8
+        self.data = bytearray() if data is None else data
+        self._view = memoryview(self.data)
+        if len(self._view) % (2 * self.size):
+            raise ValueError("Buffer size is not a multiple of the point size")
+
+    @classmethod
+    def from_coordinates(cls, curve, coordinates):
+        size = (curve.field.p.bit_length() + 7) // 8
+        return cls(curve, bytearray(b"".join(int_to_bytes(x, size) + int_to_bytes(y, size)
+                                             for x, y in coordinates)))
+
+    @classmethod
+    def from_points(cls, curve, points):
+        p = curve.field.p
+        coordinates = []
+        for point in points:
+            if not isinstance(point, Point) or point.curve != curve:
+                raise ValueError("Only points of curve %s can be stored" % curve.name)
+            coordinates.append((point.x % p, point.y % p))
+        return cls.from_coordinates(curve, coordinates)
+
+    @classmethod
+    def load(cls, curve, path):
+        # Read only array over a memory map of the file at path, whose pages are loaded on demand
+        with open(path, "rb") as f:
+            if not os.fstat(f.fileno()).st_size:
+                return cls(curve, b"")
+            return cls(curve, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def dump(self, path):
+        with open(path, "wb") as f:
+            f.write(self._view)
+
+    def close(self):
+        self._view.release()
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, point):
+        self.extend([point])
+
+    def extend(self, points):
+        # Only available for arrays backed by a bytearray. The view is released while resizing
+        if not isinstance(self.data, bytearray):
+            raise TypeError("Only arrays backed by a bytearray can be extended")
+        data = PointArray.from_points(self.curve, points).data
+        self._view.release()
+        try:
+            self.data.extend(data)
+        finally:
+            self._view = memoryview(self.data)
+
+    def coordinates(self):
+        # Yields the (x, y) coordinates of the points, without building Point instances
+        size, view = self.size, self._view
+        for i in range(0, len(view), 2 * size):
+            yield bytes_to_int(view[i:i + size]), bytes_to_int(view[i + size:i + 2 * size])
+
+    def __len__(self):
+        return len(self._view) // (2 * self.size)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            width = 2 * self.size
+            if step == 1:
+                return PointArray(self.curve, bytearray(self._view[start * width:max(start, stop) * width]))
+            return PointArray(self.curve, bytearray(b"".join(self._view[i * width:(i + 1) * width]
+                                                             for i in range(start, stop, step))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PointArray index out of range")
+        offset = 2 * self.size * index
+        return Point(self.curve, bytes_to_int(self._view[offset:offset + self.size]),
+                     bytes_to_int(self._view[offset + self.size:offset + 2 * self.size]), check=False)
+
+    def __iter__(self):
+        for x, y in self.coordinates():
+            yield Point(self.curve, x, y, check=False)
+
+
+def random_scalars(n, count):
+    # count integers uniformly drawn in [1, n - 1] from the OS CSPRNG, by rejection sampling
+    bits = n.bit_length()
+    size = (bits + 7) // 8
+    scalars = []
+    while len(scalars) < count:
+        missing = count - len(scalars)
+        data = os.urandom(size * missing)
+        for i in range(0, len(data), size):
+            k = bytes_to_int(data[i:i + size]) >> (size * 8 - bits)
+            if 0 < k < n:
+                scalars.append(k)
+    return scalars
+
+
+# From this many keypairs on, make_keypairs switches the generator table to a BULK_G_TABLE_WINDOW wide one,
+# which is about twice as fast for a one time cost of a few hundred key generations. Shared curves keep
+# their table, and a wide one is built for the call from SHARED_BULK_KEYPAIRS_MIN keypairs on, where it
+# pays for itself
+BULK_KEYPAIRS_MIN = 1000
+SHARED_BULK_KEYPAIRS_MIN = 5000
+BULK_G_TABLE_WINDOW = 8
+
+
+@_timed("make_keypairs")
+def make_keypairs(curve, count):
+    priv = random_scalars(curve.field.n, count)
+    if curve.mul_method == "ladder":
+        pubs = [curve.g.mul(k, "ladder") for k in priv]
+        return KeypairBatch(curve, priv, [pub.x for pub in pubs], [pub.y for pub in pubs])
+    table = curve.g_table
+    if table.window < BULK_G_TABLE_WINDOW:
+        if not curve._shared and count >= BULK_KEYPAIRS_MIN:
+            table = curve.precompute_g(BULK_G_TABLE_WINDOW)
+        elif count >= SHARED_BULK_KEYPAIRS_MIN:
+            table = FixedBaseTable(curve, BULK_G_TABLE_WINDOW)
+    pubs = jacobian_to_affine_batch([table.mul(k) for k in priv], curve.field.p)
+    return KeypairBatch(curve, priv, [pub[0] for pub in pubs], [pub[1] for pub in pubs])
+
+
+# Columnar storage for many keypairs: private keys and public key coordinates are kept in parallel lists
+# of ints, and Keypair instances are only built when accessed
+class KeypairBatch(object):
+    def __init__(self, curve, priv, x, y):
+        if not len(priv) == len(x) == len(y):
+            raise ValueError("Private keys and public key coordinates must have the same length")
+        self.curve = curve
+        self.priv = priv
+        self.x = x
+        self.y = y
+
+    def __len__(self):
+        return len(self.priv)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return KeypairBatch(self.curve, self.priv[index], self.x[index], self.y[index])
+        return Keypair(self.curve, self.priv[index], Point(self.curve, self.x[index], self.y[index], check=False))
+
+    def __iter__(self):
+        for i in range(len(self.priv)):
+            yield self[i]
+
+
+# Default security level of the randomized subgroup check of check_points: a batch holding a point out
+# of the subgroup passes it with probability at most 2^-SUBGROUP_CHECK_BITS
+SUBGROUP_CHECK_BITS = 128
+
+
+def check_point(curve, point):
+    # Strict validation of an untrusted point, such as the public key of a peer (SEC1, section 3.2.2.1):
+    # raises ValueError unless point is a finite point of curve, with coordinates in [0, p[, in the
+    # subgroup of order n. On curves of cofactor 1, such as all the registry ones, this is implied by
+    # the on curve check, which saves the n * point multiplication. Valid points are marked as on curve
+    x, y = _point_coordinates(curve, point)
+    _check_coordinates(curve, x, y)
+    if curve.field.h != 1 and not _in_subgroup(curve, x, y):
+        raise ValueError("Point (%d, %d) is not in the subgroup of curve \"%s\"" % (x, y, curve))
+    point.on_curve = True
+
+
+def check_points(curve, points, security=SUBGROUP_CHECK_BITS):
+    # Same as check_point on each of points, an iterable of points or a PointArray, the error naming the
+    # index of the first invalid point. On curves with a cofactor, the points are checked for subgroup
+    # membership all at once, through random linear combinations of them, with a probability of missing
+    # an invalid point of at most 2^-security
+    if isinstance(points, PointArray):
+        if points.curve != curve:
+            raise ValueError("Points belong to a different curve")
+        coordinates = list(points.coordinates())
+        points = []
+    else:
+        points = list(points)
+        coordinates = []
+        for i, point in enumerate(points):
+            try:
+                coordinates.append(_point_coordinates(curve, point))
+            except ValueError as e:
+                raise ValueError("Invalid point at index %d: %s" % (i, e))
+    for i, (x, y) in enumerate(coordinates):
+        try:
+            _check_coordinates(curve, x, y)
+        except ValueError as e:
+            raise ValueError("Invalid point at index %d: %s" % (i, e))
+    if curve.field.h != 1 and not _in_subgroup_batch(curve, coordinates, security):
+        for i, (x, y) in enumerate(coordinates):
+            if not _in_subgroup(curve, x, y):
+                raise ValueError("Invalid point at index %d: point (%d, %d) is not in the subgroup of curve "
+                                 "\"%s\"" % (i, x, y, curve))
+    for point in points:
+        point.on_curve = True
+
+
+def _point_coordinates(curve, point):
+    if isinstance(point, Inf):
+        raise ValueError("Point at infinity is not a valid point")
+    if not isinstance(point, Point):
+        raise TypeError("Expected a Point, got '%s'" % point.__class__.__name__)
+    if point.curve != curve:
+        raise ValueError("Point belongs to a different curve")
+    return point.x, point.y
+
+
+def _check_coordinates(curve, x, y):
+    p = curve.field.p
+    if not (0 <= x < p and 0 <= y < p):
+        raise ValueError("Point (%d, %d) coordinates are not reduced modulo p" % (x, y))
+    if not curve.on_curve(x, y):
+        raise ValueError("Point (%d, %d) is not on curve \"%s\"" % (x, y, curve))
+
+
+def _in_subgroup(curve, x, y):
+    # n * (x, y) is infinity. The binary method needs no table of multiples, which could hit infinity
+    # for points of small order
+    return not _derived_point(curve, x, y)._mul_binary(x, y, curve.field.n)[2]
+
+
+def _in_subgroup_batch(curve, coordinates, security):
+    # Points of the curve are P + T, with P in the subgroup and T of order dividing h. For scalars r
+    # drawn below h, n * sum(r * (P + T)) == sum(r * n * T) is infinity with probability at most 1 / q
+    # when any T is not, q being the smallest prime factor of h. Rounds are repeated up to
+    # security bits, and points are checked one by one when that would be cheaper. As scalars are
+    # below h, each sum only takes one addition per point, into the bucket of its scalar
+    h, n, a, p = curve.field.h, curve.field.n, curve.a, curve.field.p
+    q = 2
+    while h % q:
+        q += 1
+    rounds = -(-security // (q.bit_length() - 1))
+    bits = n.bit_length()
+    if rounds * (len(coordinates) + 2 * bits) >= len(coordinates) * 2 * bits:
+        return all(_in_subgroup(curve, x, y) for x, y in coordinates)
+    double, add, add_affine = curve.group_law
+    for _ in range(rounds):
+        buckets = [JACOBIAN_INF] * h
+        for x, y in coordinates:
+            r = randbelow(h)
+            if r:
+                buckets[r] = add_affine(buckets[r], x, y, a, p)
+        # sum(r * buckets[r]), through running sums of the buckets
+        S = running = JACOBIAN_INF
+        for r in range(h - 1, 0, -1):
+            running = add(running, buckets[r], a, p)
+            S = add(S, running, a, p)
+        S = jacobian_to_affine(S, p)
+        if S is not None and not _in_subgroup(curve, S[0], S[1]):
+            return False
+    return True
+
 
 class ECDH(object):
     def __init__(self, keypair):
         self.keypair = keypair
 
+    @_timed("get_secret")
     def get_secret(self, keypair):
+        k, point = self.secret_operands(keypair)
+        return k * point
+
+    def aget_secret(self, keypair, coalescer=None):
+        # Coroutine version of get_secret, run out of the event loop by a tinyec.aio.Coalescer
+        import tinyec.aio as aio
+        return aio.get_secret(self, keypair, coalescer)
+
+    @_timed("get_secrets")
+    def get_secrets(self, keypairs, executor=None):
+        # DH secrets with each of keypairs, as a list. keypairs may also hold the public keys of the peers
+        # as Point instances, or be a PointArray of them. Secrets using the private key of this keypair
+        # share its recoding and a single final normalization. With executor, a
+        # tinyec.parallel.ParallelExecutor, secrets are computed by worker processes and yielded in order
+        if executor is not None:
+            return executor.get_secrets(self, keypairs)
+        own = self.keypair.priv if self.keypair.can_sign else None
+        curve = self.keypair.curve
+        if curve.mul_method == "ladder":
+            # Each secret gets its own blinding
+            return [self.get_secret(keypair) for keypair in keypairs]
+        p = curve.field.p
+        if isinstance(keypairs, PointArray) and keypairs.curve == curve and own is not None and own % curve.field.n:
+            # Coordinates are read from the buffer, without building Point instances
+            coordinates = [(x % p, y % p) for x, y in keypairs.coordinates()]
+            return self._shared_secrets(coordinates, all(curve.on_curve(x, y) for x, y in coordinates))
+        operands = [self.secret_operands(keypair) for keypair in keypairs]
+        secrets = [None] * len(operands)
+        shared = []
+        for i, (k, point) in enumerate(operands):
+            if k == own and isinstance(point, Point) and point.curve == curve and k % curve.field.n:
+                shared.append(i)
+            else:
+                secrets[i] = k * point
+        if shared:
+            points = [operands[i][1] for i in shared]
+            trusted = all(point.on_curve for point in points)
+            for i, secret in zip(shared, self._shared_secrets([(point.x % p, point.y % p) for point in points],
+                                                              trusted)):
+                secrets[i] = secret
+        return secrets
+
+    def _shared_secrets(self, coordinates, trusted):
+        # Products of the private key of this keypair with each of the affine points of coordinates
+        curve = self.keypair.curve
+        own = self.keypair.priv
+        p = curve.field.p
+        jacobian = mul_shared(curve, abs(own), coordinates, curve.endomorphism is not None and trusted)
+        secrets = []
+        for affine in jacobian_to_affine_batch(jacobian, p):
+            if affine is None:
+                secrets.append(Inf(curve))
+                continue
+            x, y = affine[0], -affine[1] % p if own < 0 else affine[1]
+            secrets.append(_derived_point(curve, x, y) if trusted else Point(curve, x, y))
+        return secrets
+
+    def secret_operands(self, keypair):
+        # Scalar and point whose product is the DH secret. keypair may also be the public key of the peer
         # Don;t check if both keypairs are on the same curve. Should raise a warning only
+        if isinstance(keypair, Point):
+            keypair = Keypair(keypair.curve, pub=keypair)
         if self.keypair.can_sign and keypair.can_encrypt:
-            secret = self.keypair.priv * keypair.pub
+            return self.keypair.priv, keypair.pub
         elif self.keypair.can_encrypt and keypair.can_sign:
-            secret = self.keypair.pub * keypair.priv
+            return keypair.priv, self.keypair.pub
         else:
             raise ValueError("Missing crypto material to generate DH secret")
-        return secret
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import hmac
+
+import tinyec.ec as ec
+
+# Window of the odd multiples of the generator used by verifications, which are built once per curve
+VERIFY_G_WINDOW = 7
+
+
+def bits2int(data, qlen):
+    # Leftmost qlen bits of data, as an int (RFC 6979, section 2.3.2)
+    x = ec.bytes_to_int(data)
+    if len(data) * 8 > qlen:
+        x >>= len(data) * 8 - qlen
+    return x
+
+
+def rfc6979_nonces(priv, digest, n, hashfunc=hashlib.sha256):
+    # Yields the deterministic nonce candidates of RFC 6979 (section 3.2) for the private key priv and
+    # the message digest
+    qlen = n.bit_length()
+    rolen = (qlen + 7) // 8
+    size = hashfunc().digest_size
+    key = ec.int_to_bytes(priv, rolen) + ec.int_to_bytes(bits2int(digest, qlen) % n, rolen)
+    V = b"\x01" * size
+    K = b"\x00" * size
+    K = hmac.new(K, V + b"\x00" + key, hashfunc).digest()
+    V = hmac.new(K, V, hashfunc).digest()
+    K = hmac.new(K, V + b"\x01" + key, hashfunc).digest()
+    V = hmac.new(K, V, hashfunc).digest()
+    while True:
+        T = b""
+        while len(T) < rolen:
+            V = hmac.new(K, V, hashfunc).digest()
+            T += V
+        k = bits2int(T, qlen)
+        if 0 < k < n:
+            yield k
+        K = hmac.new(K, V + b"\x00", hashfunc).digest()
+        V = hmac.new(K, V, hashfunc).digest()
+
+
+class ECDSA(object):
+    def __init__(self, keypair, hashfunc=hashlib.sha256):
+        self.keypair = keypair
+        self.hashfunc = hashfunc
+
+    def sign(self, message):
+        return self.sign_digest(self.hashfunc(message).digest())
+
+    def sign_digest(self, digest):
+        # (r, s) signature of digest, with a deterministic nonce. The nonce multiplication follows the
+        # mul_method of the curve, so that curves using the ladder method sign in hardened mode
+        if not self.keypair.can_sign:
+            raise ValueError("Missing private key")
+        curve = self.keypair.curve
+        n = curve.field.n
+        e = bits2int(digest, n.bit_length())
+        for k in rfc6979_nonces(self.keypair.priv, digest, n, self.hashfunc):
+            R = k * curve.g
+            r = R.x % n
+            if not r:
+                continue
+            s = pow(k, n - 2, n) * (e + r * self.keypair.priv) % n
+            if s:
+                return r, s
+
+    def verify(self, message, signature):
+        return self.verify_digest(self.hashfunc(message).digest(), signature)
+
+    def verify_digest(self, digest, signature):
+        return verify_digests([(self.keypair, digest, signature)])[0]
+
+
+def verify_batch(items, hashfunc=hashlib.sha256):
+    # Verifies the (pub, message, signature) items, pub being a Keypair or its public key, and returns a
+    # list of booleans
+    return verify_digests([(pub, hashfunc(message).digest(), signature) for pub, message, signature in items])
+
+
+def verify_digests(items):
+    # Same as verify_batch, for (pub, digest, signature) items. The s values of each curve are inverted
+    # together, and the odd multiples of the public keys are built once per key and normalized together.
+    # Each verification is then a joint wNAF multiplication u1 * G + u2 * Q, whose x coordinate is
+    # compared to r in Jacobian coordinates, without any inversion
+    results = [False] * len(items)
+    by_curve = {}
+    for i, (pub, digest, signature) in enumerate(items):
+        if isinstance(pub, ec.Keypair):
+            pub = pub.pub
+        if not isinstance(pub, ec.Point) or not pub.on_curve:
+            continue
+        curve = pub.curve
+        r, s = signature
+        if not (0 < r < curve.field.n and 0 < s < curve.field.n):
+            continue
+        by_curve.setdefault(id(curve), (curve, []))[1].append((i, pub, digest, r, s))
+    for curve, group in by_curve.values():
+        for i, valid in zip([entry[0] for entry in group], _verify_curve(curve, group)):
+            results[i] = valid
+    return results
+
+
+def _verify_curve(curve, group):
+    n, p = curve.field.n, curve.field.p
+    window = curve.wnaf_window
+    g_table = curve.g_multiples(VERIFY_G_WINDOW)
+    keys = {}
+    for _, pub, _, _, _ in group:
+        keys.setdefault((pub.x % p, pub.y % p), len(keys))
+    key_tables = ec._odd_multiples(curve, list(keys), window)
+    endomorphism = curve.endomorphism
+    qlen = n.bit_length()
+    results = []
+    for (_, pub, digest, r, _), w in zip(group, ec.batch_mod_inv([entry[4] for entry in group], n)):
+        u1 = bits2int(digest, qlen) * w % n
+        u2 = r * w % n
+        table = key_tables[keys[(pub.x % p, pub.y % p)]]
+        if endomorphism is not None:
+            g_scalars, g_tables = endomorphism.expand_tables(curve, [u1], [g_table])
+            q_scalars, q_tables = endomorphism.expand_tables(curve, [u2], [table])
+        else:
+            g_scalars, g_tables = [u1] if u1 else [], [g_table]
+            q_scalars, q_tables = [u2], [table]
+        nafs = [ec.wnaf(k, VERIFY_G_WINDOW) for k in g_scalars] + [ec.wnaf(k, window) for k in q_scalars]
+        X, _, Z = ec._interleave(curve, nafs, g_tables[:len(g_scalars)] + q_tables)
+        if not Z:
+            results.append(False)
+            continue
+        # x(R) == X / Z^2 is in [0, p[, and may be r or r + n when n < p
+        ZZ = Z * Z % p
+        results.append(X == r * ZZ % p or (r + n < p and X == (r + n) * ZZ % p))
+    return results
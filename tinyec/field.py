@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+# Prime field arithmetic backends. All of them expose the same operations on field elements, which are
+# kept in the backend's own representation: to_field() and from_field() convert from and to plain ints
+# modulo p. Backends may also provide a specialized Jacobian group law, which Curve then uses for scalar
+# multiplications. Only the generic and Mersenne backends can be used by curves: the Solinas and Montgomery
+# ones, slower than the % operator on CPython, are limited to field element arithmetic.
+
+JACOBIAN_INF = (1, 1, 0)
+
+
+class PrimeField(object):
+    # Generic reduction, through the % operator
+    name = "generic"
+
+    def __init__(self, p):
+        self.p = p
+
+    def reduce(self, t):
+        return t % self.p
+
+    def to_field(self, x):
+        return x % self.p
+
+    def from_field(self, x):
+        return x
+
+    def add(self, x, y):
+        return self.reduce(x + y)
+
+    def sub(self, x, y):
+        return self.reduce(x - y)
+
+    def neg(self, x):
+        return self.reduce(-x)
+
+    def mul(self, x, y):
+        return self.reduce(x * y)
+
+    def sqr(self, x):
+        return self.reduce(x * x)
+
+    def inv(self, x):
+        x = self.from_field(x)
+        if not x % self.p:
+            raise ArithmeticError("Modular inverse does not exist")
+        return self.to_field(pow(x, self.p - 2, self.p))
+
+    def group_law(self, shape="generic"):
+        # (double, add, add_affine) with the signatures of tinyec.ec.jacobian_double, jacobian_add and
+        # jacobian_add_affine, or None to use those. shape is the one of tinyec.ec.curve_shape
+        return None
+
+    def __str__(self):
+        return "%s field => prime %d" % (self.name, self.p)
+
+
+class SolinasField(PrimeField):
+    # Primes of the form 2^k - c, with c much smaller than 2^k: the bits above 2^k are folded back
+    # into the low bits, as 2^k == c (mod p). Generalized Mersenne primes (NIST, secp256k1) have this
+    # form, but c can be large (2^224 for secp256r1), which takes more folds
+    name = "solinas"
+
+    def __init__(self, p):
+        super(SolinasField, self).__init__(p)
+        self.k = p.bit_length()
+        self.c = (1 << self.k) - p
+        if self.c.bit_length() > self.k * 7 // 8:
+            raise ValueError("Prime is not of the form 2^k - c with a small c")
+        self.mask = (1 << self.k) - 1
+
+    def reduce(self, t):
+        k, c, mask = self.k, self.c, self.mask
+        negative = t < 0
+        if negative:
+            t = -t
+        while t >> k:
+            t = (t & mask) + (t >> k) * c
+        if t >= self.p:
+            t -= self.p
+        return self.p - t if negative and t else t
+
+
+class MersenneField(SolinasField):
+    # Primes of the form 2^k - 1, such as the secp521r1 one: folding only takes a shift, a mask and an
+    # addition. On CPython, this is the only special form faster than the % operator, so it comes with
+    # a specialized group law
+    name = "mersenne"
+
+    def __init__(self, p):
+        super(MersenneField, self).__init__(p)
+        if self.c != 1:
+            raise ValueError("Prime is not of the form 2^k - 1")
+
+    def reduce(self, t):
+        k, mask = self.k, self.mask
+        t = (t & mask) + (t >> k)
+        t = (t & mask) + (t >> k)
+        while t >> k:
+            t = (t & mask) + (t >> k)
+        if t >= mask:
+            t -= mask
+        elif t < 0:
+            t %= mask
+        return t
+
+    def group_law(self, shape="generic"):
+        return _mersenne_group_law(self.k, shape)
+
+
+def _mersenne_group_law(K, shape):
+    # Same formulas as the generic group law, with the reductions inlined. Two folds bring any value
+    # below 2^(2K + 6) (in absolute value) within [-32, 2^K + 32], a conditional addition or
+    # substraction completing the reduction where a canonical value is required
+    M = (1 << K) - 1
+
+    def double(P, a, p):
+        X1, Y1, Z1 = P
+        if not Z1 or not Y1:
+            return JACOBIAN_INF
+        t = Y1 * Y1
+        YY = (t & M) + (t >> K)
+        t = 4 * X1 * YY
+        t = (t & M) + (t >> K)
+        S = (t & M) + (t >> K)
+        if shape == "a=0":
+            t = 3 * X1 * X1
+        elif shape == "a=-3":
+            t = Z1 * Z1
+            ZZ = (t & M) + (t >> K)
+            t = 3 * (X1 - ZZ) * (X1 + ZZ)
+        else:
+            t = Z1 * Z1
+            ZZ = (t & M) + (t >> K)
+            t = ZZ * ZZ
+            t = 3 * X1 * X1 + a * ((t & M) + (t >> K))
+        t = (t & M) + (t >> K)
+        T = (t & M) + (t >> K)
+        t = T * T - 2 * S
+        t = (t & M) + (t >> K)
+        t = (t & M) + (t >> K)
+        X3 = t - M if t >= M else (t + M if t < 0 else t)
+        t = YY * YY
+        t = T * (S - X3) - 8 * ((t & M) + (t >> K))
+        t = (t & M) + (t >> K)
+        t = (t & M) + (t >> K)
+        Y3 = t - M if t >= M else (t + M if t < 0 else t)
+        t = 2 * Y1 * Z1
+        t = (t & M) + (t >> K)
+        t = (t & M) + (t >> K)
+        Z3 = t - M if t >= M else (t + M if t < 0 else t)
+        return X3, Y3, Z3
+
+    def _add(X1, Y1, Z1, U2, S2, Z2, a, p, P):
+        # Common end of the additions, from U1 = X1, S1 = Y1 and canonical U2, S2
+        if X1 == U2:
+            if Y1 == S2:
+                return double(P, a, p)
+            return JACOBIAN_INF
+        H = U2 - X1
+        R = S2 - Y1
+        t = H * H
+        HH = (t & M) + (t >> K)
+        t = H * HH
+        HHH = (t & M) + (t >> K)
+        t = X1 * HH
+        V = (t & M) + (t >> K)
+        t = R * R - HHH - 2 * V
+        t = (t & M) + (t >> K)
+        t = (t & M) + (t >> K)
+        X3 = t - M if t >= M else (t + M if t < 0 else t)
+        t = R * (V - X3) - Y1 * HHH
+        t = (t & M) + (t >> K)
+        t = (t & M) + (t >> K)
+        Y3 = t - M if t >= M else (t + M if t < 0 else t)
+        t = Z1 * Z2
+        t = ((t & M) + (t >> K)) * H
+        t = (t & M) + (t >> K)
+        t = (t & M) + (t >> K)
+        Z3 = t - M if t >= M else (t + M if t < 0 else t)
+        return X3, Y3, Z3
+
+    def add(P, Q, a, p):
+        X1, Y1, Z1 = P
+        X2, Y2, Z2 = Q
+        if not Z1:
+            return Q
+        if not Z2:
+            return P
+        t = Z1 * Z1
+        Z1Z1 = (t & M) + (t >> K)
+        t = Z2 * Z2
+        Z2Z2 = (t & M) + (t >> K)
+        t = X1 * Z2Z2
+        t = (t & M) + (t >> K)
+        t = (t & M) + (t >> K)
+        U1 = t - M if t >= M else (t + M if t < 0 else t)
+        t = X2 * Z1Z1
+        t = (t & M) + (t >> K)
+        t = (t & M) + (t >> K)
+        U2 = t - M if t >= M else (t + M if t < 0 else t)
+        t = Z2 * Z2Z2
+        t = Y1 * ((t & M) + (t >> K))
+        t = (t & M) + (t >> K)
+        t = (t & M) + (t >> K)
+        S1 = t - M if t >= M else (t + M if t < 0 else t)
+        t = Z1 * Z1Z1
+        t = Y2 * ((t & M) + (t >> K))
+        t = (t & M) + (t >> K)
+        t = (t & M) + (t >> K)
+        S2 = t - M if t >= M else (t + M if t < 0 else t)
+        return _add(U1, S1, Z1, U2, S2, Z2, a, p, P)
+
+    def add_affine(P, x2, y2, a, p):
+        X1, Y1, Z1 = P
+        if not Z1:
+            return x2 % p, y2 % p, 1
+        t = Z1 * Z1
+        Z1Z1 = (t & M) + (t >> K)
+        t = x2 * Z1Z1
+        t = (t & M) + (t >> K)
+        t = (t & M) + (t >> K)
+        U2 = t - M if t >= M else (t + M if t < 0 else t)
+        t = Z1 * Z1Z1
+        t = y2 * ((t & M) + (t >> K))
+        t = (t & M) + (t >> K)
+        t = (t & M) + (t >> K)
+        S2 = t - M if t >= M else (t + M if t < 0 else t)
+        return _add(X1 % p, Y1 % p, Z1, U2, S2, 1, a, p, P)
+
+    return double, add, add_affine
+
+
+class MontgomeryField(PrimeField):
+    # Elements are kept multiplied by R = 2^k, so that products are reduced with shifts and masks
+    # instead of a division (REDC). Suited to primes without a special form, such as the Brainpool ones
+    name = "montgomery"
+
+    def __init__(self, p):
+        if not p & 1:
+            raise ValueError("Montgomery representation requires an odd modulus")
+        super(MontgomeryField, self).__init__(p)
+        self.k = p.bit_length()
+        self.mask = (1 << self.k) - 1
+        # p' such that p * p' == -1 (mod R), p^-1 being p^(2^(k - 1) - 1) (mod R) by Euler's theorem
+        self.p_prime = -pow(p, (1 << (self.k - 1)) - 1, 1 << self.k) & self.mask
+        self.r2 = (1 << (2 * self.k)) % p
+
+    def redc(self, t):
+        # t * R^-1 (mod p), for 0 <= t < p * R
+        m = (t & self.mask) * self.p_prime & self.mask
+        t = (t + m * self.p) >> self.k
+        return t - self.p if t >= self.p else t
+
+    def to_field(self, x):
+        return self.redc((x % self.p) * self.r2)
+
+    def from_field(self, x):
+        return self.redc(x)
+
+    def mul(self, x, y):
+        return self.redc(x * y)
+
+    def sqr(self, x):
+        return self.redc(x * x)
+
+    def add(self, x, y):
+        t = x + y
+        return t - self.p if t >= self.p else t
+
+    def sub(self, x, y):
+        t = x - y
+        return t + self.p if t < 0 else t
+
+    def neg(self, x):
+        return self.p - x if x else 0
+
+
+BACKENDS = {"generic": PrimeField,
+            "solinas": SolinasField,
+            "mersenne": MersenneField,
+            "montgomery": MontgomeryField}
+
+
+def select_backend(p):
+    # Fastest backend for p on CPython, where the % operator runs in C: it beats Solinas folding and
+    # Montgomery reduction written in python for all registry primes, except the Mersenne one
+    if p > 3 and not (p + 1) & p:
+        return MersenneField(p)
+    return PrimeField(p)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import collections
+
+import tinyec.ec as ec
+
+# Field multiplications (squarings included, multiplications by small constants excluded) of the group
+# law formulas, used to estimate the field_mul counts. Doublings depend on the shape of the curve
+FORMULA_COSTS = {"double": {"generic": 10, "a=0": 7, "a=-3": 8},
+                 "add": 16,
+                 "add_affine": 11,
+                 "complete_add": 17}
+
+OPERATIONS = ("double", "add", "add_affine", "complete_add", "inversion", "field_mul")
+
+
+class Recorder(object):
+    # Collects operation counts and wall times of tinyec.ec while active, as a context manager:
+    #
+    #   with Recorder() as recorder:
+    #       ecdh.get_secret(peer)
+    #   recorder.counts["secp256r1"]["double"]
+    #
+    # counts maps curve names to a Counter of OPERATIONS, and timings maps curve names to the calls and
+    # seconds of each public operation (mul, add, multi_mul, get_secret...). Timings are inclusive: a
+    # get_secret also shows up as a mul. hook, if set, is called with snapshot() when the recorder exits,
+    # to export the results. Work done by the worker processes of tinyec.parallel is not recorded
+    def __init__(self, hook=None):
+        self.hook = hook
+        self._previous = None
+        self.reset()
+
+    def __enter__(self):
+        self._previous = ec._recorder
+        ec._recorder = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        ec._recorder = self._previous
+        self._previous = None
+        if self.hook is not None:
+            self.hook(self.snapshot())
+
+    def reset(self):
+        self.counts = collections.defaultdict(collections.Counter)
+        self.timings = collections.defaultdict(lambda: collections.defaultdict(lambda: {"calls": 0, "seconds": 0.0}))
+        # Curve names by field prime and group order, to attribute inversions
+        self._moduli = {}
+        # Counting group laws by curve, along with the law they wrap
+        self._laws = {}
+
+    def snapshot(self):
+        # Plain dict copy of the results, safe to serialize
+        return {"counts": dict((name, dict(counter)) for name, counter in self.counts.items()),
+                "timings": dict((name, dict((op, dict(timing)) for op, timing in ops.items()))
+                                for name, ops in self.timings.items())}
+
+    def _register(self, curve):
+        self._moduli[curve.field.p] = curve.name
+        self._moduli[curve.field.n] = curve.name
+
+    def group_law(self, curve):
+        # Same formulas as curve.group_law, counting their calls
+        law = curve._group_law
+        cached = self._laws.get(id(curve))
+        if cached is not None and cached[0] is law:
+            return cached[1]
+        self._register(curve)
+        counter = self.counts[curve.name]
+        double, add, add_affine = law
+        counted = (_counted(double, counter, "double", FORMULA_COSTS["double"][curve.shape]),
+                   _counted(add, counter, "add", FORMULA_COSTS["add"]),
+                   _counted(add_affine, counter, "add_affine", FORMULA_COSTS["add_affine"]))
+        self._laws[id(curve)] = (law, counted)
+        return counted
+
+    def complete_add(self, curve):
+        self._register(curve)
+        return _counted(ec.complete_add, self.counts[curve.name], "complete_add", FORMULA_COSTS["complete_add"])
+
+    def count_inversion(self, modulus, muls=0):
+        # One modular inversion, along with the muls field multiplications of a batch inversion
+        counter = self.counts[self._moduli.get(modulus, "unknown")]
+        counter["inversion"] += 1
+        counter["field_mul"] += muls
+
+    def record(self, op, seconds, first_arg, result):
+        curve = _curve_of(first_arg) or _curve_of(result)
+        if curve is not None:
+            self._register(curve)
+        timing = self.timings[curve.name if curve is not None else "unknown"][op]
+        timing["calls"] += 1
+        timing["seconds"] += seconds
+
+
+def _counted(func, counter, name, muls):
+    def wrapper(*args):
+        counter[name] += 1
+        counter["field_mul"] += muls
+        return func(*args)
+    return wrapper
+
+
+def _curve_of(value):
+    if isinstance(value, ec.Curve):
+        return value
+    if isinstance(value, ec.ECDH):
+        return value.keypair.curve
+    curve = getattr(value, "curve", None)
+    return curve if isinstance(curve, ec.Curve) else None
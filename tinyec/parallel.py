@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import collections
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import tinyec.ec as ec
+import tinyec.registry as reg
+
+
+def curve_key(curve):
+    # Compact description of a curve, cheap to pickle: the registry name for named curves, or the
+    # domain parameters otherwise
+    params = reg.EC_CURVE_REGISTRY.get(curve.name)
+    if params is not None and (params["p"], params["a"], params["b"], params["g"], params["n"], params["h"]) == \
+            (curve.field.p, curve.a, curve.b, tuple(curve.field.g), curve.field.n, curve.field.h):
+        return curve.name
+    return (curve.a, curve.b, curve.field.p, tuple(curve.field.g), curve.field.n, curve.field.h, curve.name)
+
+
+def curve_from_key(key):
+    if isinstance(key, tuple):
+        a, b, p, g, n, h, name = key
+        return ec.Curve(a, b, ec.SubGroup(p, g, n, h), name)
+    return reg.get_curve(key)
+
+
+# Curves already built by this worker process, along with their precomputations
+_worker_curves = {}
+
+
+def _worker_curve(key):
+    curve = _worker_curves.get(key)
+    if curve is None:
+        curve = curve_from_key(key)
+        curve.precompute_g()
+        _worker_curves[key] = curve
+    return curve
+
+
+def _mul_chunk(key, jobs, hardened=False):
+    # With hardened, multiplications use the ladder method, as on the curve of the caller
+    curve = _worker_curve(key)
+    p = curve.field.p
+    if hardened:
+        results = [ec.Point(curve, x, y, check=False).mul(k, "ladder") if k else ec.Inf(curve) for k, x, y in jobs]
+        return [(point.x, point.y) if isinstance(point, ec.Point) else None for point in results]
+    k = jobs[0][0]
+    if k % curve.field.n and all(job[0] == k for job in jobs):
+        # Single scalar, such as the private key of ECDH.get_secrets: it is recoded once for the chunk
+        points = [(x % p, y % p) for _, x, y in jobs]
+        glv = curve.endomorphism is not None and all(curve.on_curve(x, y) for x, y in points)
+        results = ec.mul_shared(curve, abs(k), points, glv)
+        if k < 0:
+            results = [(X, -Y % p, Z) for X, Y, Z in results]
+        return ec.jacobian_to_affine_batch(results, p)
+    results = []
+    for k, x, y in jobs:
+        if k % curve.field.n == 0:
+            results.append(ec.JACOBIAN_INF)
+            continue
+        X, Y, Z = ec.Point(curve, x, y)._mul_jacobian(abs(k))
+        results.append((X, -Y % p if k < 0 else Y, Z))
+    return ec.jacobian_to_affine_batch(results, p)
+
+
+class ParallelExecutor(object):
+    # Runs scalar multiplications on a pool of worker processes. Jobs are sent in chunks of
+    # (k, x, y) ints along with a compact curve key, and results come back as coordinates, in order
+    def __init__(self, max_workers=None, chunk_size=64, executor=None):
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive")
+        self.chunk_size = chunk_size
+        self._owned = executor is None
+        self.executor = executor or ProcessPoolExecutor(max_workers=max_workers)
+        # Bounds the chunks in flight. With an executor of the caller, max_workers should give its size
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def shutdown(self, wait=True):
+        if self._owned:
+            self.executor.shutdown(wait=wait)
+
+    def _chunks(self, jobs):
+        jobs = iter(jobs)
+        while True:
+            chunk = list(itertools.islice(jobs, self.chunk_size))
+            if not chunk:
+                return
+            curve = chunk[0][1].curve
+            keyed = []
+            for k, point in chunk:
+                if point.curve is not curve:
+                    # Split the chunk, so that each one only holds points of a single curve instance, as
+                    # instances of the same curve may differ in mul_method
+                    yield curve, keyed
+                    curve = point.curve
+                    keyed = []
+                keyed.append((k, point))
+            yield curve, keyed
+
+    def mul(self, jobs):
+        # Yields k * P for each (k, P) of jobs, in order. At most 2 chunks per worker are in flight, so
+        # that arbitrarily long iterables can be streamed
+        keys = {}
+        pending = collections.deque()
+        for curve, chunk in self._chunks(jobs):
+            for k, point in chunk:
+                if not (isinstance(k, int) or isinstance(k, ec.LONG_TYPE)):
+                    raise TypeError("Unsupported operand type(s) for *: '%s' and '%s'" % (
+                        k.__class__.__name__, point.__class__.__name__))
+            key = keys.get(id(curve))
+            if key is None:
+                key = keys[id(curve)] = curve_key(curve)
+            payload = [(k, point.x, point.y) if isinstance(point, ec.Point) else (0, 0, 0) for k, point in chunk]
+            pending.append((curve, self.executor.submit(_mul_chunk, key, payload, curve.mul_method == "ladder")))
+            while len(pending) > 2 * self.max_workers:
+                for result in self._results(*pending.popleft()):
+                    yield result
+        while pending:
+            for result in self._results(*pending.popleft()):
+                yield result
+
+    def _results(self, curve, future):
+        for affine in future.result():
+            if affine is None:
+                yield ec.Inf(curve)
+            else:
+                yield ec.Point(curve, affine[0], affine[1], check=False)
+
+    def get_secrets(self, ecdh, keypairs):
+        # Yields the DH secret of ecdh with each of keypairs, in order
+        return self.mul(ecdh.secret_operands(keypair) for keypair in keypairs)
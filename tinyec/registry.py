@@ -79,7 +79,15 @@ EC_CURVE_REGISTRY = {"brainpoolP160r1": {"p": 0xE95E4A5F737059DC60DFC7AD95B3D813
                                    "g": (0x79be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798,
                                          0x483ada7726a3c4655da4fbfc0e1108a8fd17b448a68554199c47d08ffb10d4b8),
                                    "n": 0xfffffffffffffffffffffffffffffffebaaedce6af48a03bbfd25e8cd0364141,
-                                   "h": 0x1},
+                                   "h": 0x1,
+                                   # Optional endomorphism (x, y) => (beta * x, y) == lambda * (x, y), along
+                                   # with a basis of short vectors (a, b) such that a + b * lambda == 0 (mod n)
+                                   "endomorphism": {"beta": 0x7ae96a2b657c07106e64479eac3434e99cf0497512f58995c1396c28719501ee,
+                                                    "lambda": 0x5363ad4cc05c30e0a5261c028812645a122e22ea20816678df02967c1b23bd72,
+                                                    "basis": ((0x3086d221a7d46bcde86c90e49284eb15,
+                                                               -0xe4437ed6010e88286f547fa90abfe4c3),
+                                                              (0x114ca50f7a8e2f3f657c1108d9d44cfd8,
+                                                               0x3086d221a7d46bcde86c90e49284eb15))}},
                      "secp384r1": {"p": 0xfffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffeffffffff0000000000000000ffffffff,
                                    "a": 0xfffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffeffffffff0000000000000000fffffffc,
                                    "b": 0xb3312fa7e23ee7e4988e056be3f82d19181d9c6efe8141120314088f5013875ac656398d8a2ed19d2a85c8edd3ec2aef,
@@ -96,16 +104,67 @@ EC_CURVE_REGISTRY = {"brainpoolP160r1": {"p": 0xE95E4A5F737059DC60DFC7AD95B3D813
                                    "h": 0x1}}
 
 
-def get_curve(name):
-    curve_params = {}
-    for k, v in EC_CURVE_REGISTRY.items():
-        if name.lower() == k.lower():
-            curve_params = v
-    if curve_params == {}:
-        raise ValueError("Unknown elliptic curve name")
+# Other names of the registry curves, as used by OpenSSL, NIST or SEC 2
+EC_CURVE_ALIASES = {"prime192v1": "secp192r1",
+                    "P-192": "secp192r1",
+                    "nistp192": "secp192r1",
+                    "P-224": "secp224r1",
+                    "nistp224": "secp224r1",
+                    "prime256v1": "secp256r1",
+                    "P-256": "secp256r1",
+                    "nistp256": "secp256r1",
+                    "P-384": "secp384r1",
+                    "nistp384": "secp384r1",
+                    "P-521": "secp521r1",
+                    "nistp521": "secp521r1"}
+
+# Normalized name => registry name, rebuilt on misses so that registry and aliases can be extended
+_curve_index = {}
+# Registry name => shared Curve instance
+_curve_cache = {}
+
+
+def _normalize(name):
+    return name.lower().replace("-", "").replace("_", "").replace(" ", "")
+
+
+def _registry_name(name):
+    global _curve_index
+    key = _normalize(name)
+    registry_name = _curve_index.get(key)
+    if registry_name is None or registry_name not in EC_CURVE_REGISTRY:
+        index = dict((_normalize(alias), k) for alias, k in EC_CURVE_ALIASES.items())
+        index.update((_normalize(k), k) for k in EC_CURVE_REGISTRY)
+        _curve_index = index
+        registry_name = index.get(key)
+        if registry_name is None or registry_name not in EC_CURVE_REGISTRY:
+            raise ValueError("Unknown elliptic curve name")
+    return registry_name
+
+
+def make_curve(name):
+    # Builds a new Curve instance, which is not shared with other callers
+    registry_name = _registry_name(name)
+    curve_params = EC_CURVE_REGISTRY[registry_name]
     try:
         sub_group = ec.SubGroup(curve_params["p"], curve_params["g"], curve_params["n"], curve_params["h"])
-        curve = ec.Curve(curve_params["a"], curve_params["b"], sub_group, name)
+        endomorphism = curve_params.get("endomorphism")
+        if endomorphism is not None:
+            endomorphism = ec.Endomorphism(endomorphism["beta"], endomorphism["lambda"], endomorphism["basis"])
+        curve = ec.Curve(curve_params["a"], curve_params["b"], sub_group, registry_name, endomorphism)
     except KeyError:
         raise RuntimeError("Missing parameters for curve %s" % name)
     return curve
+
+
+def get_curve(name):
+    # Curves are built once and shared between all callers, along with their precomputations. Their
+    # settings (mul_method, backend, generator table...) are read-only, make_curve giving an instance
+    # which can be tuned
+    registry_name = _registry_name(name)
+    curve = _curve_cache.get(registry_name)
+    if curve is None:
+        curve = make_curve(registry_name)
+        curve._shared = True
+        curve = _curve_cache.setdefault(registry_name, curve)
+    return curve